@@ -4,15 +4,224 @@ Hybrid Configurable Detector - Uses proven algorithms from ShortTemplateBeepDete
 but makes key parameters configurable. No reinventing the wheel!
 """
 
+import bisect
+import functools
+import logging
+import math
+import os
+import threading
 import librosa
 import numpy as np
+import scipy.fft
+import scipy.ndimage
 import scipy.signal
-from scipy.signal import find_peaks, correlate, hilbert
+import soundfile as sf
+from scipy.signal import find_peaks, oaconvolve
+from scripts.peak_utils import absmax, find_peaks_sparse
 from dataclasses import dataclass
 from typing import List, Tuple, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+log = logging.getLogger(__name__)
+
+# Threads per scipy.fft call (-1 = all cores); set to 1 when detectors already run in parallel processes
+_FFT_WORKERS = -1
+
+
+def _load_mono(path: str) -> Tuple[np.ndarray, int]:
+    """
+    Decode at native rate as mono float32; libsndfile directly, with
+    librosa (audioread/ffmpeg) only for codecs it can't read such as m4a
+    """
+    try:
+        audio, sr = sf.read(path, dtype='float32', always_2d=False)
+    except sf.LibsndfileError:
+        return librosa.load(path, sr=None, mono=True)
+    
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1, dtype=np.float32)
+    return audio, sr
+
+
+def _resample(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """Polyphase resampling to target_sr (single pass, no librosa resampler)"""
+    if orig_sr == target_sr:
+        return audio
+    g = math.gcd(target_sr, orig_sr)
+    resampled = scipy.signal.resample_poly(audio, target_sr // g, orig_sr // g)
+    return resampled.astype(np.float32, copy=False)
+
+
+_target_cache_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=2)
+def _decode_target(path: str, mtime_ns: int, size: int, sample_rate: int) -> np.ndarray:
+    audio, orig_sr = _load_mono(path)
+    audio = _resample(audio, orig_sr, sample_rate).astype(np.float32, copy=False)
+    audio.flags.writeable = False  # shared between detectors
+    return audio
+
+
+def _load_target(path: str, sample_rate: int) -> np.ndarray:
+    """
+    Decoded, resampled target audio, cached so the COUNT and GO phases decode a
+    file once. Keyed on mtime/size so a re-downloaded file is decoded again; the
+    lock makes a concurrent second phase wait for the first decode, not repeat it.
+    """
+    st = os.stat(path)
+    with _target_cache_lock:
+        return _decode_target(path, st.st_mtime_ns, st.st_size, sample_rate)
+
+
+# Prepared template arrays shared by every detector built from the same template file
+# and settings; keyed like _decode_target so an edited template is processed again
+_template_cache_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=8)
+def _prepared_template(template_path: str, mtime_ns: int, size: int, template_duration: float,
+                       silence_threshold: float, sample_rate: int, precision: str) -> Tuple[np.ndarray, ...]:
+    prepared = _process_template(template_path, template_duration, silence_threshold, sample_rate, precision)
+    for array in prepared:
+        array.flags.writeable = False  # shared between detectors
+    return prepared
+
+
+def _process_template(template_path: str, template_duration: float, silence_threshold: float,
+                      sample_rate: int, precision: str) -> Tuple[np.ndarray, ...]:
+    """
+    Load, trim, resample and normalize the template (FROM ORIGINAL)
+
+    Returns:
+        (template_audio, reference_norm, reversed reference_norm,
+         rfft magnitude, rfft magnitude normalized to peak 1)
+    """
+    print(f"🎵 Loading template: {template_path}")
+
+    # Load original template
+    template_raw, orig_sr = _load_mono(template_path)
+    print(f"   Original: {len(template_raw)} samples at {orig_sr} Hz")
+
+    # Trim to desired duration (PROVEN: 0.5s is optimal)
+    template_samples = int(template_duration * orig_sr)
+    if len(template_raw) > template_samples:
+        template_raw = template_raw[:template_samples]
+    print(f"   Trimmed to {template_duration}s: {len(template_raw)} samples")
+
+    # CRITICAL: Remove silence using amplitude envelope (FROM ORIGINAL)
+    template_trimmed = _trim_silence_envelope(template_raw, orig_sr, silence_threshold)
+
+    # Resample to target rate
+    if orig_sr != sample_rate:
+        print(f"   Resampling: {orig_sr} Hz -> {sample_rate} Hz")
+        template_trimmed = _resample(template_trimmed, orig_sr, sample_rate)
+
+    template_audio = template_trimmed.astype(precision, copy=True)
+    print(f"   Final template: {len(template_audio)} samples ({len(template_audio)/sample_rate:.3f}s)")
+
+    # ORIGINAL normalization method - critical! Template is fixed, so normalize once
+    reference_norm = template_audio.copy()
+    reference_norm /= absmax(reference_norm)
+    # Contiguous time-reversed kernel so the FFT correlation never copies it
+    reference_rev = np.ascontiguousarray(reference_norm[::-1])
+
+    # Cache template magnitude spectrum for spectral validation
+    template_fft_mag = np.abs(scipy.fft.rfft(template_audio))
+    template_fft_mag_norm = template_fft_mag / np.max(template_fft_mag)
+
+    return template_audio, reference_norm, reference_rev, template_fft_mag, template_fft_mag_norm
+
+
+def _trim_silence_envelope(audio: np.ndarray, sr: int, silence_threshold: float) -> np.ndarray:
+    """
+    Silence trimming from original, using a 5ms running max of |x| as the
+    envelope instead of the Hilbert transform (O(N), no FFTs)
+    """
+    envelope = scipy.ndimage.maximum_filter1d(np.abs(audio), size=max(1, sr // 200))
+
+    # Smooth envelope (FROM ORIGINAL) - O(N) running mean, zero-padded like np.convolve 'same'
+    window_size = max(1, len(envelope) // 50)
+    if window_size > 1:
+        envelope = scipy.ndimage.uniform_filter1d(envelope, size=window_size, mode='constant')
+
+    # Find energy above threshold
+    max_energy = np.max(envelope)
+    above_threshold = envelope > (max_energy * silence_threshold)
+
+    indices = np.where(above_threshold)[0]
+    if len(indices) == 0:
+        return audio
+
+    start_idx = indices[0]
+    end_idx = indices[-1] + 1
+
+    # Keep 5ms buffer before onset (FROM ORIGINAL)
+    buffer = int(0.005 * sr)
+    start_idx = max(0, start_idx - buffer)
+
+    trimmed = audio[start_idx:end_idx]
+    print(f"   Silence removed: {len(audio)} -> {len(trimmed)} samples")
+    return trimmed
+
+
+@functools.lru_cache(maxsize=1)
+def _cuda_fftconvolve():
+    """
+    GPU fftconvolve operating on host arrays, or None when CuPy or a CUDA
+    device is unavailable. Probed once per process
+    """
+    try:
+        import cupy
+        from cupyx.scipy.signal import fftconvolve
+        if cupy.cuda.runtime.getDeviceCount() == 0:
+            return None
+    except Exception as e:
+        log.debug("CUDA backend unavailable: %s", e)
+        return None
+    
+    def convolve(x: np.ndarray, kernel: np.ndarray, mode: str = 'full') -> np.ndarray:
+        return cupy.asnumpy(fftconvolve(cupy.asarray(x), cupy.asarray(kernel), mode=mode))
+    return convolve
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _pearson_rows(rows, ref):
+        """Pearson correlation of each row against ref, centered two-pass like the NumPy path (0.0 if undefined)"""
+        n = ref.shape[0]
+        mean_b = 0.0
+        for k in range(n):
+            mean_b += ref[k]
+        mean_b /= n
+        sum_bb = 0.0
+        for k in range(n):
+            d = ref[k] - mean_b
+            sum_bb += d * d
+        
+        out = np.zeros(rows.shape[0])
+        for r in range(rows.shape[0]):
+            mean_a = 0.0
+            for k in range(n):
+                mean_a += rows[r, k]
+            mean_a /= n
+            sum_aa = 0.0
+            sum_ab = 0.0
+            for k in range(n):
+                d = rows[r, k] - mean_a
+                sum_aa += d * d
+                sum_ab += d * (ref[k] - mean_b)
+            if sum_aa > 0.0 and sum_bb > 0.0:
+                out[r] = sum_ab / (np.sqrt(sum_aa) * np.sqrt(sum_bb))
+        return out
+
 @dataclass
 class HybridConfig:
     """Configuration that makes proven algorithms tunable"""
@@ -39,24 +248,54 @@ class HybridConfig:
     target_sample_rate: int = 22050         # Proven optimal sample rate
     filter_order: int = 6                   # Butterworth filter order
     parabolic_refinement: bool = True       # Enable sub-sample refinement
+    chunk_seconds: float = 30.0             # Block size for filtering/correlation (0 = whole signal)
+    filter_margin_seconds: float = 0.5      # Overlap per block edge so zero-phase filtering matches
+    use_fft: Optional[bool] = None          # Correlation via FFT (None = auto by template length)
+    direct_max_template_seconds: float = 0.2  # Auto: templates shorter than this correlate directly
+    precision: str = 'float32'              # Sample dtype for filtering/correlation ('float64' for reference runs)
+    backend: str = 'cpu'                    # Correlation backend: 'cpu' or 'cuda' (CuPy, falls back to cpu)
     
     # Output settings
     max_detections: Optional[int] = None    # Limit number of results
     min_confidence: float = 0.0             # Minimum confidence to include
 
+class AudioContext:
+    """
+    Target audio decoded once and shared by detectors for several templates.
+    Filtering and correlation depend on each template, so only the decoded,
+    resampled signal is shared
+    """
+    
+    def __init__(self, path: str, sample_rate: int = 22050):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.audio = _load_target(path, sample_rate)
+
 class HybridConfigurableDetector:
     """
     Hybrid detector using proven ShortTemplateBeepDetector algorithms
     with configurable parameters. ULTRATHINK: Don't reinvent, parameterize!
     """
     
-    def __init__(self, template_path: str, target_path: str, config: HybridConfig = None):
+    def __init__(self, template_path: str, target_path: Optional[str] = None, config: HybridConfig = None,
+                 search_intervals_ms: Optional[List[Tuple[float, float]]] = None,
+                 audio_ctx: Optional[AudioContext] = None):
+        if target_path is None and audio_ctx is None:
+            raise ValueError("Either target_path or audio_ctx is required")
         self.template_path = template_path
-        self.target_path = target_path
+        self.target_path = target_path if target_path is not None else audio_ctx.path
         self.config = config or HybridConfig()
+        self.audio_ctx = audio_ctx
+        
+        # Optional (start_ms, end_ms) windows of match start times to search;
+        # None searches the whole target
+        self.search_intervals_ms = search_intervals_ms
+        self._search_ranges = None
         
         # Audio data (will be loaded)
         self.template_audio = None
+        self.reference_norm = None
+        self._reference_rev = None
         self.target_audio = None
         self.sample_rate = self.config.target_sample_rate
         
@@ -64,64 +303,30 @@ class HybridConfigurableDetector:
         self.dominant_frequencies = None
         self.filter_range = None
         
-    def load_and_process_template(self):
-        """
-        EXACT template processing from original - proven to work
-        """
-        print(f"🎵 Loading template: {self.template_path}")
-        
-        # Load original template
-        template_raw, orig_sr = librosa.load(self.template_path, sr=None)
-        print(f"   Original: {len(template_raw)} samples at {orig_sr} Hz")
-        
-        # Trim to desired duration (PROVEN: 0.5s is optimal)
-        template_samples = int(self.config.template_duration * orig_sr)
-        if len(template_raw) > template_samples:
-            template_raw = template_raw[:template_samples]
-        print(f"   Trimmed to {self.config.template_duration}s: {len(template_raw)} samples")
-        
-        # CRITICAL: Remove silence using Hilbert envelope (FROM ORIGINAL)
-        template_trimmed = self._trim_silence_hilbert(template_raw, orig_sr)
-        
-        # Resample to target rate
-        if orig_sr != self.sample_rate:
-            print(f"   Resampling: {orig_sr} Hz -> {self.sample_rate} Hz")
-            template_trimmed = librosa.resample(
-                template_trimmed, orig_sr=orig_sr, target_sr=self.sample_rate
-            )
+        # Cached template spectrum (computed once after template load)
+        self._template_fft_mag = None
+        self._template_fft_mag_norm = None
         
-        self.template_audio = template_trimmed
-        print(f"   Final template: {len(self.template_audio)} samples ({len(self.template_audio)/self.sample_rate:.3f}s)")
-    
-    def _trim_silence_hilbert(self, audio: np.ndarray, sr: int) -> np.ndarray:
+        # Cached bandpass design: ((low_norm, high_norm), sos)
+        self._filter_sos = None
+        
+    def load_and_process_template(self):
         """
-        EXACT silence trimming from original using Hilbert envelope
+        EXACT template processing from original - proven to work. The prepared
+        arrays are cached per template file and settings, so batch runs over many
+        targets process each template once
         """
-        envelope = np.abs(hilbert(audio))
-        
-        # Smooth envelope (FROM ORIGINAL)
-        window_size = max(1, len(envelope) // 50)
-        if window_size > 1:
-            envelope = np.convolve(envelope, np.ones(window_size)/window_size, mode='same')
-        
-        # Find energy above threshold
-        max_energy = np.max(envelope)
-        above_threshold = envelope > (max_energy * self.config.silence_threshold)
-        
-        indices = np.where(above_threshold)[0]
-        if len(indices) == 0:
-            return audio
-        
-        start_idx = indices[0]
-        end_idx = indices[-1] + 1
-        
-        # Keep 5ms buffer before onset (FROM ORIGINAL)
-        buffer = int(0.005 * sr)
-        start_idx = max(0, start_idx - buffer)
-        
-        trimmed = audio[start_idx:end_idx]
-        print(f"   Silence removed: {len(audio)} -> {len(trimmed)} samples")
-        return trimmed
+        st = os.stat(self.template_path)
+        with _template_cache_lock:
+            misses = _prepared_template.cache_info().misses
+            prepared = _prepared_template(self.template_path, st.st_mtime_ns, st.st_size,
+                                          self.config.template_duration, self.config.silence_threshold,
+                                          self.sample_rate, np.dtype(self.config.precision).str)
+            if _prepared_template.cache_info().misses == misses:
+                print(f"🎵 Loading template: {self.template_path} (cached)")
+        
+        (self.template_audio, self.reference_norm, self._reference_rev,
+         self._template_fft_mag, self._template_fft_mag_norm) = prepared
     
     def analyze_template_frequencies(self):
         """
@@ -129,15 +334,13 @@ class HybridConfigurableDetector:
         """
         print("🔍 Analyzing template frequencies...")
         
-        # FFT analysis (FROM ORIGINAL)
-        fft = np.fft.fft(self.template_audio)
-        freqs = np.fft.fftfreq(len(fft), 1/self.sample_rate)
-        magnitude = np.abs(fft)
+        # FFT analysis (FROM ORIGINAL) - rfft magnitude is already cached at template load
+        magnitude = self._template_fft_mag
+        freqs = scipy.fft.rfftfreq(len(self.template_audio), 1/self.sample_rate)
         
         # Find peaks (FROM ORIGINAL LOGIC)
-        half_len = len(magnitude) // 2
         peaks, _ = find_peaks(
-            magnitude[:half_len], 
+            magnitude, 
             height=np.max(magnitude) * 0.15,  # ORIGINAL threshold
             distance=5
         )
@@ -183,9 +386,17 @@ class HybridConfigurableDetector:
             high_norm = 0.3
         
         try:
-            # EXACT same filter as original
-            b, a = scipy.signal.butter(self.config.filter_order, [low_norm, high_norm], btype='band')
-            filtered_audio = scipy.signal.filtfilt(b, a, audio)
+            # Same Butterworth design as original, applied as second-order sections. The
+            # original filtfilt(b, a) did not realize this design for narrow bands: for the
+            # COUNT band the rounded (b, a) polynomial has a ~1.45x passband peak, so
+            # COUNT candidates differ from the original (merged/split, or moved by up to
+            # ~1s). Final COUNT→GO patterns on tests/*.wav are the same races, within ~12 ms
+            band = (low_norm, high_norm)
+            if self._filter_sos is None or self._filter_sos[0] != band:
+                sos = scipy.signal.butter(self.config.filter_order, list(band), btype='band', output='sos')
+                sos = sos.astype(audio.dtype, copy=False)
+                self._filter_sos = (band, sos)
+            filtered_audio = self._sosfiltfilt_chunked(self._filter_sos[1], audio)
             
             # Safety check (FROM ORIGINAL)
             if np.any(np.isnan(filtered_audio)) or np.any(np.isinf(filtered_audio)):
@@ -197,10 +408,118 @@ class HybridConfigurableDetector:
             print(f"   ⚠️  Filter error: {e}")
             return audio
     
+    def _chunk_samples(self) -> int:
+        return int(self.config.chunk_seconds * self.sample_rate)
+    
+    def _blocks(self, ranges: List[Tuple[int, int]]):
+        """Split each (start, end) sample range into chunk-sized blocks"""
+        chunk = self._chunk_samples()
+        for lo, hi in ranges:
+            step = chunk if chunk > 0 else hi - lo
+            for start in range(lo, hi, step):
+                yield start, min(start + step, hi)
+    
+    def _compute_search_ranges(self):
+        """
+        Convert search_intervals_ms to merged, clipped ranges of correlation
+        indices (match start samples); None when the whole target is searched
+        """
+        if self.search_intervals_ms is None:
+            self._search_ranges = None
+            return
+        
+        n_valid = len(self.target_audio) - len(self.template_audio) + 1
+        ranges = []
+        for start_ms, end_ms in sorted(self.search_intervals_ms):
+            start = max(0, int(start_ms / 1000 * self.sample_rate))
+            end = min(n_valid, int(math.ceil(end_ms / 1000 * self.sample_rate)) + 1)
+            if start >= end:
+                continue
+            if ranges and start <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+            else:
+                ranges.append((start, end))
+        self._search_ranges = ranges
+    
+    def _sosfiltfilt_chunked(self, sos: np.ndarray, audio: np.ndarray) -> np.ndarray:
+        """
+        Zero-phase filtering block by block; each block is filtered with a margin
+        on both sides that is discarded, so the IIR transients never reach the output.
+        With search ranges, only the audio those matches cover is filtered (rest is 0)
+        """
+        if self._search_ranges is None:
+            chunk = self._chunk_samples()
+            if chunk <= 0 or len(audio) <= chunk:
+                return scipy.signal.sosfiltfilt(sos, audio)
+            filtered = np.empty_like(audio)
+            ranges = [(0, len(audio))]
+        else:
+            filtered = np.zeros_like(audio)
+            tail = len(self.template_audio) - 1
+            ranges = [(start, min(len(audio), end + tail)) for start, end in self._search_ranges]
+        
+        margin = int(self.config.filter_margin_seconds * self.sample_rate)
+        for start, end in self._blocks(ranges):
+            lo = max(0, start - margin)
+            hi = min(len(audio), end + margin)
+            block = scipy.signal.sosfiltfilt(sos, audio[lo:hi])
+            filtered[start:end] = block[start - lo:end - lo]
+        return filtered
+    
+    def _block_convolver(self, kernel_len: int):
+        """'valid'-mode convolution used per correlation block, per backend and template length"""
+        if self.config.backend == 'cuda':
+            convolve = _cuda_fftconvolve()
+            if convolve is not None:
+                return convolve
+            print("   ⚠️  CUDA backend unavailable (needs cupy and a GPU), using CPU")
+        return oaconvolve if self._use_fft(kernel_len) else np.convolve
+    
+    def _use_fft(self, kernel_len: int) -> bool:
+        """FFT correlation unless configured otherwise or the template is very short"""
+        if self.config.use_fft is not None:
+            return self.config.use_fft
+        return kernel_len >= self.config.direct_max_template_seconds * self.sample_rate
+    
+    def _correlate_chunked(self, target: np.ndarray, kernel_rev: np.ndarray) -> np.ndarray:
+        """
+        'valid' correlation with an already time-reversed kernel, via overlap-save:
+        each block of outputs needs its own samples plus len(kernel_rev) - 1 of overlap.
+        Within a block, oaconvolve picks an overlap-add FFT size suited to the short kernel;
+        very short kernels are cheaper as a direct sliding dot product
+        """
+        convolve = self._block_convolver(len(kernel_rev))
+        chunk = self._chunk_samples()
+        n_valid = len(target) - len(kernel_rev) + 1
+        if self._search_ranges is None:
+            if chunk <= 0 or n_valid <= chunk:
+                return convolve(target, kernel_rev, mode='valid')
+            ranges = [(0, n_valid)]
+        else:
+            ranges = self._search_ranges
+        
+        correlation = np.empty(n_valid, dtype=np.result_type(target, kernel_rev))
+        searched = np.zeros(n_valid, dtype=bool)
+        for start, end in self._blocks(ranges):
+            block = target[start:end + len(kernel_rev) - 1]
+            correlation[start:end] = convolve(block, kernel_rev, mode='valid')
+            searched[start:end] = True
+        
+        # Unsearched positions sit at the searched minimum so they can never be peaks
+        if not searched.all():
+            correlation[~searched] = correlation[searched].min()
+        return correlation
+    
     def load_target_audio(self):
         """Load and prepare target audio"""
         print(f"🎵 Loading target: {self.target_path}")
-        self.target_audio, _ = librosa.load(self.target_path, sr=self.sample_rate)
+        # Decoded as float32 (16-bit sources carry no more); widened only if configured
+        ctx = self.audio_ctx
+        if ctx is not None and ctx.path == self.target_path and ctx.sample_rate == self.sample_rate:
+            audio = ctx.audio
+        else:
+            audio = _load_target(self.target_path, self.sample_rate)
+        self.target_audio = audio.astype(self.config.precision, copy=False)
         print(f"   Loaded: {len(self.target_audio)} samples ({len(self.target_audio)/self.sample_rate:.1f}s)")
     
     def perform_template_matching(self, filtered_audio: np.ndarray) -> List[dict]:
@@ -209,27 +528,37 @@ class HybridConfigurableDetector:
         """
         print("🔍 Performing template matching...")
         
-        # ORIGINAL normalization method - critical!
-        reference_norm = self.template_audio / np.max(np.abs(self.template_audio))
-        target_norm = filtered_audio / np.max(np.abs(filtered_audio))
+        # ORIGINAL correlation, computed via overlap-add FFTs in overlap-save blocks (all cores by default)
+        with scipy.fft.set_workers(_FFT_WORKERS):
+            correlation = self._correlate_chunked(filtered_audio, self._reference_rev)
         
-        # ORIGINAL correlation
-        correlation = correlate(target_norm, reference_norm, mode='valid')
+        # ORIGINAL normalization method - critical! (template side precomputed at load).
+        # Correlation is linear, so scaling the output in place equals normalizing the
+        # target first, without a second full-length copy of the audio
+        correlation /= absmax(filtered_audio)
         
         if len(correlation) == 0:
             print("   ❌ No valid correlation")
-            return []
+            return [], correlation
         
         # ORIGINAL peak finding
         max_corr = np.max(correlation)
         threshold = max_corr * self.config.correlation_threshold
         min_distance_samples = int(self.config.min_distance_seconds * self.sample_rate)
         
-        peaks, _ = find_peaks(
-            correlation,
-            height=threshold,
-            distance=min_distance_samples
-        )
+        # Peaks inside the duplicate window would be dropped after spectral validation
+        # anyway; reject them here so they never cost an FFT
+        duplicate_window_samples = int(self.config.duplicate_window_ms * self.sample_rate / 1000)
+        min_distance_samples = max(1, min_distance_samples, duplicate_window_samples)
+        
+        # Only the few samples above threshold can be peaks; fall back to a full scan otherwise
+        peaks = find_peaks_sparse(correlation, threshold, min_distance_samples)
+        if peaks is None:
+            peaks, _ = find_peaks(
+                correlation,
+                height=threshold,
+                distance=min_distance_samples
+            )
         
         print(f"   Found {len(peaks)} correlation peaks above {self.config.correlation_threshold:.1%}")
         
@@ -257,35 +586,32 @@ class HybridConfigurableDetector:
             
         print("🔧 Refining with parabolic interpolation...")
         
+        if not detections:
+            return []
+        
+        # ORIGINAL parabolic interpolation, evaluated for all peaks at once
+        idx = np.array([d['peak_idx'] for d in detections])
+        inner = (idx > 0) & (idx < len(correlation) - 1)
+        i = np.where(inner, idx, 1)  # placeholder index keeps the slices in bounds
+        y1, y2, y3 = correlation[i - 1], correlation[i], correlation[i + 1]
+        a = (y1 - 2*y2 + y3) / 2
+        b = (y3 - y1) / 2
+        
+        refinable = inner & (np.abs(a) > 1e-10)
+        safe_a = np.where(refinable, a, 1.0)
+        x_offset = np.clip(-b / (2*safe_a), -0.5, 0.5)  # ORIGINAL limit
+        refined_times_ms = ((idx + x_offset) / self.sample_rate) * 1000
+        
         refined = []
-        for detection in detections:
-            peak_idx = detection['peak_idx']
-            
-            # ORIGINAL parabolic interpolation
-            if 0 < peak_idx < len(correlation) - 1:
-                y1, y2, y3 = correlation[peak_idx-1], correlation[peak_idx], correlation[peak_idx+1]
-                a = (y1 - 2*y2 + y3) / 2
-                b = (y3 - y1) / 2
-                
-                if abs(a) > 1e-10:
-                    x_offset = -b / (2*a)
-                    x_offset = np.clip(x_offset, -0.5, 0.5)  # ORIGINAL limit
-                    precise_peak = peak_idx + x_offset
-                    refined_time_ms = (precise_peak / self.sample_rate) * 1000
-                    
-                    refined.append({
-                        'time_ms': refined_time_ms,
-                        'confidence': detection['confidence'],
-                        'original_time_ms': detection['time_ms'],
-                        'refined': True
-                    })
-                    print(f"   Refined: {detection['time_ms']:.2f} -> {refined_time_ms:.2f} ms")
-                else:
-                    refined.append({
-                        'time_ms': detection['time_ms'],
-                        'confidence': detection['confidence'],
-                        'refined': False
-                    })
+        for detection, is_refined, refined_time_ms in zip(detections, refinable, refined_times_ms):
+            if is_refined:
+                refined.append({
+                    'time_ms': float(refined_time_ms),
+                    'confidence': detection['confidence'],
+                    'original_time_ms': detection['time_ms'],
+                    'refined': True
+                })
+                log.debug("Refined: %.2f -> %.2f ms", detection['time_ms'], refined_time_ms)
             else:
                 refined.append({
                     'time_ms': detection['time_ms'],
@@ -293,6 +619,7 @@ class HybridConfigurableDetector:
                     'refined': False
                 })
         
+        print(f"   Refined {int(np.count_nonzero(refinable))}/{len(detections)} peaks")
         return refined
     
     def validate_spectral_similarity(self, detections: List[dict], filtered_audio: np.ndarray) -> List[dict]:
@@ -301,70 +628,72 @@ class HybridConfigurableDetector:
         """
         print("🔍 Validating spectral similarity...")
         
-        validated = []
+        # Collect full-length segments for a single batched FFT
+        template_len = len(self.template_audio)
+        candidates = []
+        starts = []
         for detection in detections:
-            time_ms = detection['time_ms']
-            start_sample = int((time_ms / 1000) * self.sample_rate)
-            end_sample = start_sample + len(self.template_audio)
+            start_sample = int((detection['time_ms'] / 1000) * self.sample_rate)
+            end_sample = start_sample + template_len
             
             if 0 <= start_sample < len(filtered_audio) and end_sample <= len(filtered_audio):
-                audio_segment = filtered_audio[start_sample:end_sample]
-                
-                # ORIGINAL spectral validation method
-                is_valid, spectral_score = self._validate_spectrum_fft(audio_segment)
+                candidates.append(detection)
+                starts.append(start_sample)
+        
+        if not candidates:
+            return []
+        
+        segments = np.stack([filtered_audio[s:s + template_len] for s in starts])
+        spectral_scores = self._spectral_similarity_batch(segments)
+        
+        validated = []
+        for detection, spectral_similarity in zip(candidates, spectral_scores):
+            # ORIGINAL threshold
+            if spectral_similarity > self.config.spectral_threshold:
+                time_ms = detection['time_ms']
+                spectral_score = max(0.0, float(spectral_similarity))
+                final_confidence = detection['confidence'] * spectral_score
                 
-                if is_valid:
-                    final_confidence = detection['confidence'] * spectral_score
-                    
-                    validated.append({
-                        'time_ms': time_ms,
-                        'confidence': final_confidence,
-                        'correlation_confidence': detection['confidence'],
-                        'spectral_score': spectral_score,
-                        'refined': detection.get('refined', False)
-                    })
-                    print(f"   ✅ VALIDATED: {time_ms:.2f} ms (final: {final_confidence:.3f})")
+                validated.append({
+                    'time_ms': time_ms,
+                    'confidence': final_confidence,
+                    'correlation_confidence': detection['confidence'],
+                    'spectral_score': spectral_score,
+                    'refined': detection.get('refined', False)
+                })
+                log.debug("VALIDATED: %.2f ms (final: %.3f)", time_ms, final_confidence)
         
+        print(f"   ✅ Validated {len(validated)}/{len(detections)} detections")
         return validated
     
-    def _validate_spectrum_fft(self, audio_segment: np.ndarray) -> Tuple[bool, float]:
+    def _spectral_similarity_batch(self, segments: np.ndarray) -> np.ndarray:
         """
-        EXACT spectral validation from original using FFT correlation
+        Spectral validation score for (K, template_len) segments: Pearson correlation
+        of each row's normalized magnitude spectrum with the template's (0.0 where undefined).
         """
-        if len(audio_segment) < len(self.template_audio) // 2:
-            return False, 0.0
+        seg_mags = np.abs(scipy.fft.rfft(segments, axis=1, workers=_FFT_WORKERS))
+        row_max = seg_mags.max(axis=1, keepdims=True)
+        valid_rows = row_max[:, 0] > 0
         
-        try:
-            # Ensure same length (FROM ORIGINAL)
-            min_len = min(len(audio_segment), len(self.template_audio))
-            seg = audio_segment[:min_len]
-            ref = self.template_audio[:min_len]
-            
-            # FFT (FROM ORIGINAL)
-            seg_fft = np.fft.fft(seg)
-            ref_fft = np.fft.fft(ref)
-            
-            # Magnitude correlation (FROM ORIGINAL)
-            seg_mag = np.abs(seg_fft)
-            ref_mag = np.abs(ref_fft)
-            
-            if np.max(seg_mag) > 0 and np.max(ref_mag) > 0:
-                seg_norm = seg_mag / np.max(seg_mag)
-                ref_norm = ref_mag / np.max(ref_mag)
-                
-                spectral_similarity = np.corrcoef(seg_norm, ref_norm)[0, 1]
-                
-                if np.isnan(spectral_similarity):
-                    spectral_similarity = 0.0
-                
-                # ORIGINAL threshold
-                is_valid = spectral_similarity > self.config.spectral_threshold
-                return is_valid, max(0.0, spectral_similarity)
+        scores = np.zeros(len(segments))
+        if not np.any(valid_rows) or np.max(self._template_fft_mag) <= 0:
+            return scores
+        
+        seg_norm = seg_mags[valid_rows] / row_max[valid_rows]
+        if NUMBA_AVAILABLE:
+            scores[valid_rows] = _pearson_rows(seg_norm, self._template_fft_mag_norm)
+            return scores
         
-        except Exception:
-            pass
+        # Pearson correlation (same as np.corrcoef) as a single matrix-vector product
+        seg_centered = seg_norm - seg_norm.mean(axis=1, keepdims=True)
+        ref_centered = self._template_fft_mag_norm - self._template_fft_mag_norm.mean()
         
-        return False, 0.0
+        denom = np.linalg.norm(seg_centered, axis=1) * np.linalg.norm(ref_centered)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarity = (seg_centered @ ref_centered) / denom
+        
+        scores[valid_rows] = np.nan_to_num(similarity, nan=0.0, posinf=0.0, neginf=0.0)
+        return scores
     
     def remove_duplicates(self, detections: List[dict]) -> List[dict]:
         """
@@ -378,17 +707,22 @@ class HybridConfigurableDetector:
         # Sort by confidence (FROM ORIGINAL)
         detections.sort(key=lambda x: x['confidence'], reverse=True)
         
-        # ORIGINAL duplicate removal logic
+        # ORIGINAL duplicate removal logic (greedy by confidence), with accepted
+        # times kept sorted so each check only looks at the nearest neighbours
+        window_ms = self.config.duplicate_window_ms
         final_detections = []
+        accepted_times = []
         for detection in detections:
-            is_duplicate = False
-            for existing in final_detections:
-                if abs(detection['time_ms'] - existing['time_ms']) < self.config.duplicate_window_ms:
-                    is_duplicate = True
-                    break
+            time_ms = detection['time_ms']
+            pos = bisect.bisect_left(accepted_times, time_ms)
+            is_duplicate = (
+                (pos < len(accepted_times) and accepted_times[pos] - time_ms < window_ms) or
+                (pos > 0 and time_ms - accepted_times[pos - 1] < window_ms)
+            )
             
             if not is_duplicate:
                 final_detections.append(detection)
+                accepted_times.insert(pos, time_ms)
         
         print(f"   Removed {len(detections) - len(final_detections)} duplicates")
         return final_detections
@@ -396,6 +730,9 @@ class HybridConfigurableDetector:
     def process_audio(self) -> List[float]:
         """
         Main processing pipeline - combines all proven algorithms
+        
+        Returns:
+            Detection times in ms, always in ascending order
         """
         print("🚀 HYBRID CONFIGURABLE DETECTOR")
         print("=" * 50)
@@ -412,6 +749,13 @@ class HybridConfigurableDetector:
         
         # Step 3: Load target audio
         self.load_target_audio()
+        self._compute_search_ranges()
+        if self._search_ranges == []:
+            print("❌ No search intervals inside the target")
+            return []
+        if self._search_ranges is not None:
+            searched = sum(end - start for start, end in self._search_ranges)
+            print(f"🎯 Searching {len(self._search_ranges)} intervals ({searched / self.sample_rate:.1f}s of audio)")
         
         # Step 4: Apply frequency filtering (CRITICAL)
         filtered_audio = self.apply_frequency_filter(self.target_audio)
@@ -11,12 +11,164 @@ Version: 1.0
 Date: 2025
 """
 
-from scripts.hybrid_configurable_detector import HybridConfigurableDetector, HybridConfig
+import argparse
 import csv
+import hashlib
 import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+import sys
 import time
-from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
+import numpy as np
+from typing import List, Dict, Tuple, Optional, Iterator, TYPE_CHECKING
+from dataclasses import dataclass, asdict
+
+# The detection engine pulls in scipy and librosa; it is imported where detection
+# actually runs so constructing detectors and configs stays cheap
+if TYPE_CHECKING:
+    from scripts.hybrid_configurable_detector import AudioContext, HybridConfig
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+_RESULTS_INITED = False
+
+# Bump when detection output changes for the same inputs (including scoring arithmetic,
+# e.g. the Numba spectral score), to invalidate cached candidates
+_CACHE_VERSION = 2
+
+# One row per COUNT→GO pattern (struct-of-arrays while detection runs). Matching
+# works in seconds; the detector's millisecond times are kept only for output
+_PATTERN_DTYPE = np.dtype([
+    ('count_ms', 'f8'),
+    ('go_ms', 'f8'),
+    ('gap_s', 'f8'),
+    ('start_s', 'f8'),
+    ('seq', 'i4'),
+])
+
+def _iter_dicts(patterns: np.ndarray) -> Iterator[Dict]:
+    """Yield the public dict form of each _PATTERN_DTYPE row"""
+    for count_ms, go_ms, gap_s, _, seq in patterns.tolist():
+        yield {
+            'count_time_ms': count_ms,
+            'go_time_ms': go_ms,
+            'gap_seconds': gap_s,
+            'start_time_ms': count_ms,  # Use COUNT as official start
+            'pattern_type': 'COUNT→GO',
+            'sequence_number': seq
+        }
+
+def _mmss(ms: float) -> str:
+    sec = ms / 1000
+    return f"{int(sec // 60):02d}:{sec % 60:06.3f}"
+
+def _sorted_times(times: List[float]) -> np.ndarray:
+    """
+    Candidate times as an ascending float64 array. process_audio already sorts
+    its output, so this is normally one linear check
+    """
+    arr = np.asarray(times, dtype=np.float64)
+    if np.any(arr[1:] < arr[:-1]):
+        arr = np.sort(arr)
+    return arr
+
+def _file_signature(path: str) -> str:
+    """Size and modification time, enough to notice a replaced or edited file"""
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+def _require_file(path: str, description: str) -> None:
+    """Raise FileNotFoundError unless path exists (one stat call)"""
+    try:
+        os.stat(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"{description} not found: {path}") from None
+
+def _pair_indices(count_arr: np.ndarray, go_arr: np.ndarray, min_gap: float, max_gap: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices (ci, gi) of every COUNT/GO pair with min_gap <= go - count <= max_gap,
+    in count-major order. Both inputs must be sorted: each COUNT's valid GOs are
+    then one contiguous run of go_arr, located with searchsorted.
+    """
+    lo = np.searchsorted(go_arr, count_arr + min_gap, side='left')
+    hi = np.searchsorted(go_arr, count_arr + max_gap, side='right')
+    run_lengths = np.maximum(hi - lo, 0)
+    ci = np.repeat(np.arange(len(count_arr)), run_lengths)
+    run_starts = np.cumsum(run_lengths) - run_lengths
+    offsets = np.arange(run_lengths.sum()) - np.repeat(run_starts, run_lengths)
+    gi = np.repeat(lo, run_lengths) + offsets
+    return ci, gi
+
+def _overlap_keep(starts: np.ndarray, scores: np.ndarray, window: float) -> np.ndarray:
+    """
+    Mask of patterns with no other pattern closer than window that has a
+    strictly lower score, i.e. whose score equals the minimum over its window
+    """
+    order = np.argsort(starts, kind='stable')
+    starts_sorted = starts[order]
+    scores_sorted = scores[order]
+    lo = np.searchsorted(starts_sorted, starts_sorted - window, side='right')
+    hi = np.searchsorted(starts_sorted, starts_sorted + window, side='left')
+    
+    # Sparse table of power-of-two range minima answers every window in O(1)
+    table = [scores_sorted]
+    while 2 ** len(table) <= len(scores_sorted):
+        prev = table[-1]
+        half = 2 ** (len(table) - 1)
+        table.append(np.minimum(prev[:-half], prev[half:]))
+    # A window of 0 (or less) holds no pattern, not even its own; those are kept
+    nonempty = hi > lo
+    level = np.zeros(len(lo), dtype=int)
+    level[nonempty] = np.floor(np.log2(hi[nonempty] - lo[nonempty]))
+    window_min = np.full_like(scores_sorted, np.inf)
+    for k in np.unique(level[nonempty]):
+        rows = np.flatnonzero(nonempty & (level == k))
+        span = 2 ** k
+        window_min[rows] = np.minimum(table[k][lo[rows]], table[k][hi[rows] - span])
+    
+    keep = np.empty(len(starts), dtype=bool)
+    keep[order] = scores_sorted <= window_min
+    return keep
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _pair_indices(count_arr, go_arr, min_gap, max_gap):
+        # Two-pointer sweep: the window start only moves forward as COUNT advances
+        ci = []
+        gi = []
+        lo = 0
+        for c in range(len(count_arr)):
+            while lo < len(go_arr) and go_arr[lo] - count_arr[c] < min_gap:
+                lo += 1
+            g = lo
+            while g < len(go_arr) and go_arr[g] - count_arr[c] <= max_gap:
+                ci.append(c)
+                gi.append(g)
+                g += 1
+        return np.array(ci, dtype=np.int64), np.array(gi, dtype=np.int64)
+    
+    @njit(cache=True)
+    def _overlap_keep(starts, scores, window):
+        order = np.argsort(starts, kind='mergesort')
+        n = len(order)
+        keep = np.ones(n, dtype=np.bool_)
+        lo = 0
+        hi = 0
+        for k in range(n):
+            i = order[k]
+            while lo < n and starts[i] - starts[order[lo]] >= window:
+                lo += 1
+            while hi < n and starts[order[hi]] - starts[i] < window:
+                hi += 1
+            for m in range(lo, hi):
+                if scores[order[m]] < scores[i]:
+                    keep[i] = False
+                    break
+        return keep
 
 @dataclass
 class PatternConfig:
@@ -153,6 +305,56 @@ class PatternConfig:
     Ensures each race start is represented by a single optimal pattern
     Typical gap preference: 4-5 seconds (realistic race timing)
     """
+    
+    gate_go_search: bool = False
+    """
+    Only search for GO signals where they could complete a COUNT→GO pattern
+    
+    When enabled, COUNT detection runs first and GO correlation is restricted
+    to [COUNT + min_gap, COUNT + max_gap] windows (padded by the GO template
+    duration), skipping the rest of the stream.
+    
+    False = COUNT and GO phases run concurrently over the whole audio
+    True = Sequential phases, far less GO work when COUNT candidates are sparse;
+    the GO correlation threshold is then relative to the best match inside
+    the windows rather than over the whole stream
+    """
+    
+    backend: str = 'cpu'
+    """
+    Correlation backend for both detection phases
+    
+    'cpu' = SciPy FFT correlation (default)
+    'cuda' = CuPy FFT correlation on the GPU (pip install cupy-cuda12x);
+    falls back to the CPU when CuPy or a CUDA device is missing
+    """
+    
+    verbose: bool = False
+    """
+    List every raw COUNT→GO pair during pattern matching
+    
+    False = Phase summaries only (production runs, CI logs)
+    True = One line per matched pair before overlap removal (debugging)
+    """
+    
+    cache_dir: Optional[str] = None
+    """
+    Directory for cached COUNT/GO candidate times (None = no caching, the default)
+    
+    Candidates are keyed by the audio and template files (size + mtime) and
+    the per-template detection settings. Pattern matching and overlap removal
+    always rerun, so gap and overlap parameters can be tuned without redoing
+    correlation.
+    """
+
+def _run_detector(template_path: str, audio_ctx: 'AudioContext', config: 'HybridConfig',
+                  search_intervals_ms: Optional[List[Tuple[float, float]]] = None) -> List[float]:
+    """Run one single-template detection phase and return its beep times (ms)"""
+    from scripts.hybrid_configurable_detector import HybridConfigurableDetector
+    
+    detector = HybridConfigurableDetector(template_path, config=config, search_intervals_ms=search_intervals_ms,
+                                          audio_ctx=audio_ctx)
+    return detector.process_audio()
 
 class PatternEnhancedDetector:
     """
@@ -182,10 +384,8 @@ class PatternEnhancedDetector:
         self.config = config or PatternConfig()
         
         # Validate template files
-        if not os.path.exists(count_template):
-            raise FileNotFoundError(f"Count template not found: {count_template}")
-        if not os.path.exists(go_template):
-            raise FileNotFoundError(f"Go template not found: {go_template}")
+        _require_file(count_template, "Count template")
+        _require_file(go_template, "Go template")
     
     def detect_patterns(self, audio_file: str = None) -> List[Dict]:
         """
@@ -200,9 +400,18 @@ class PatternEnhancedDetector:
         target_audio = audio_file or self.audio_file
         if not target_audio:
             raise ValueError("No audio file specified")
-            
-        if not os.path.exists(target_audio):
-            raise FileNotFoundError(f"Audio file not found: {target_audio}")
+        _require_file(target_audio, "Audio file")
+        
+        return list(self._iter_patterns(target_audio))
+    
+    def _iter_patterns(self, target_audio: str) -> Iterator[Dict]:
+        """
+        Run detection and yield the final patterns in time order
+        
+        Overlap removal needs every candidate, so nothing is yielded until
+        matching is complete; records are then produced one at a time
+        """
+        from scripts.hybrid_configurable_detector import HybridConfig
         
         print('🎯 PATTERN ENHANCED DETECTOR - COUNT→GO ANALYSIS')
         print('=' * 70)
@@ -212,54 +421,55 @@ class PatternEnhancedDetector:
         print(f'⚙️  Pattern gap: {self.config.min_gap_seconds}-{self.config.max_gap_seconds}s')
         print('=' * 70)
         
-        # Step 1: Detect COUNT candidates
-        print('🔍 Phase 1: Detecting COUNT candidates...')
+        # Step 1 & 2: Detect COUNT and GO candidates (independent, run concurrently)
+        print('🔍 Phase 1+2: Detecting COUNT and GO candidates in parallel...')
         count_config = HybridConfig(
             correlation_threshold=self.config.count_correlation_threshold,
             spectral_threshold=self.config.count_spectral_threshold,
             min_distance_seconds=self.config.min_distance_seconds,
-            template_duration=self.config.count_template_duration
+            template_duration=self.config.count_template_duration,
+            backend=self.config.backend
         )
         
-        count_detector = HybridConfigurableDetector(self.count_template, target_audio, count_config)
-        count_times = count_detector.process_audio()
-        print(f'   ✅ Found {len(count_times)} COUNT candidates')
-        
-        # Step 2: Detect GO candidates  
-        print('🔍 Phase 2: Detecting GO candidates...')
         go_config = HybridConfig(
             correlation_threshold=self.config.go_correlation_threshold,
             spectral_threshold=self.config.go_spectral_threshold,
             min_distance_seconds=self.config.min_distance_seconds,
-            template_duration=self.config.go_template_duration
+            template_duration=self.config.go_template_duration,
+            backend=self.config.backend
         )
         
-        go_detector = HybridConfigurableDetector(self.go_template, target_audio, go_config)
-        go_times = go_detector.process_audio()
+        cache_path = self._candidate_cache_path(target_audio, count_config, go_config)
+        cached = self._load_candidates(cache_path)
+        if cached is not None:
+            count_times, go_times = cached
+            print(f'   💾 Loaded cached candidates: {cache_path}')
+        else:
+            count_times, go_times = self._detect_candidates(target_audio, count_config, go_config)
+            self._save_candidates(cache_path, count_times, go_times)
+        print(f'   ✅ Found {len(count_times)} COUNT candidates')
         print(f'   ✅ Found {len(go_times)} GO candidates')
         
         # Step 3: Pattern matching
         print(f'🔍 Phase 3: Matching COUNT→GO patterns ({self.config.min_gap_seconds}-{self.config.max_gap_seconds}s gap)...')
         
-        valid_patterns = []
-        min_gap_ms = self.config.min_gap_seconds * 1000
-        max_gap_ms = self.config.max_gap_seconds * 1000
-        
-        for count_time in count_times:
-            for go_time in go_times:
-                gap_ms = go_time - count_time
-                gap_seconds = gap_ms / 1000
-                
-                if min_gap_ms <= gap_ms <= max_gap_ms:
-                    pattern = {
-                        'count_time_ms': count_time,
-                        'go_time_ms': go_time,
-                        'gap_seconds': gap_seconds,
-                        'start_time_ms': count_time,  # Use COUNT as official start
-                        'pattern_type': 'COUNT→GO'
-                    }
-                    valid_patterns.append(pattern)
-                    print(f'   ✅ Pattern: COUNT at {count_time/1000:.1f}s → GO at {go_time/1000:.1f}s (Δ{gap_seconds:.1f}s)')
+        # Pair search and overlap removal are sorted sweeps, in seconds
+        count_ms = _sorted_times(count_times)
+        go_ms = _sorted_times(go_times)
+        count_s = count_ms / 1000
+        go_s = go_ms / 1000
+        ci, gi = _pair_indices(count_s, go_s, float(self.config.min_gap_seconds), float(self.config.max_gap_seconds))
+        
+        valid_patterns = np.empty(len(ci), dtype=_PATTERN_DTYPE)
+        valid_patterns['count_ms'] = count_ms[ci]
+        valid_patterns['go_ms'] = go_ms[gi]
+        valid_patterns['start_s'] = count_s[ci]  # Use COUNT as official start
+        valid_patterns['gap_s'] = go_s[gi] - valid_patterns['start_s']
+        if self.config.verbose:
+            sys.stdout.write(''.join(
+                f'   ✅ Pattern: COUNT at {count:.1f}s → GO at {go:.1f}s (Δ{gap:.1f}s)\n'
+                for count, go, gap in zip(count_s[ci].tolist(), go_s[gi].tolist(), valid_patterns['gap_s'].tolist())
+            ))
         
         print(f'🎯 Found {len(valid_patterns)} raw patterns')
         
@@ -271,39 +481,99 @@ class PatternEnhancedDetector:
             valid_patterns = cleaned_patterns
         
         # Step 5: Sort by time and add sequence numbers
-        valid_patterns.sort(key=lambda x: x['start_time_ms'])
-        for i, pattern in enumerate(valid_patterns, 1):
-            pattern['sequence_number'] = i
+        valid_patterns = valid_patterns[np.argsort(valid_patterns['start_s'], kind='stable')]
+        valid_patterns['seq'] = np.arange(1, len(valid_patterns) + 1)
         
         print(f'\n🏆 FINAL RESULT: {len(valid_patterns)} verified COUNT→GO patterns')
         
-        return valid_patterns
+        yield from _iter_dicts(valid_patterns)
+    
+    def _detect_candidates(self, target_audio: str, count_config: 'HybridConfig',
+                           go_config: 'HybridConfig') -> Tuple[List[float], List[float]]:
+        """Run the COUNT and GO detection phases, returning both candidate time lists (ms)"""
+        from scripts.hybrid_configurable_detector import AudioContext
+        
+        # Decode the target once for both templates
+        audio_ctx = AudioContext(target_audio, count_config.target_sample_rate)
+        
+        if self.config.gate_go_search:
+            count_times = _run_detector(self.count_template, audio_ctx, count_config)
+            go_times = _run_detector(self.go_template, audio_ctx, go_config,
+                                     self._go_search_intervals(count_times))
+            return count_times, go_times
+        
+        # Threads rather than processes: filtering and FFT correlation run in
+        # NumPy/SciPy C code that releases the GIL, and nothing needs to be pickled
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            count_future = executor.submit(_run_detector, self.count_template, audio_ctx, count_config)
+            go_future = executor.submit(_run_detector, self.go_template, audio_ctx, go_config)
+            return count_future.result(), go_future.result()
+    
+    def _candidate_cache_path(self, target_audio: str, count_config: 'HybridConfig',
+                              go_config: 'HybridConfig') -> Optional[str]:
+        """Cache file for this audio/template/detection-settings combination"""
+        if self.config.cache_dir is None:
+            return None
+        
+        key_parts = [
+            _CACHE_VERSION,
+            _file_signature(target_audio),
+            _file_signature(self.count_template),
+            _file_signature(self.go_template),
+            asdict(count_config),
+            asdict(go_config),
+            self.config.gate_go_search,
+        ]
+        if self.config.gate_go_search:
+            # Gated GO candidates also depend on the windows derived from COUNT
+            key_parts.append(self._go_search_intervals([0.0]))
+        key = hashlib.blake2b(repr(key_parts).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.config.cache_dir, f"{key}.npz")
+    
+    @staticmethod
+    def _load_candidates(cache_path: Optional[str]) -> Optional[Tuple[List[float], List[float]]]:
+        """Cached (count_times, go_times), or None on a miss or unreadable file"""
+        if cache_path is None:
+            return None
+        try:
+            with np.load(cache_path) as cached:
+                return cached['count_times'].tolist(), cached['go_times'].tolist()
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+    
+    @staticmethod
+    def _save_candidates(cache_path: Optional[str], count_times: List[float], go_times: List[float]) -> None:
+        """Write candidates atomically; a failed write only costs the next run a recompute"""
+        if cache_path is None:
+            return
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                np.savez(f,
+                         count_times=np.asarray(count_times, dtype=np.float64),
+                         go_times=np.asarray(go_times, dtype=np.float64))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f'   ⚠️  Could not write candidate cache: {e}')
+    
+    def _go_search_intervals(self, count_times: List[float]) -> List[Tuple[float, float]]:
+        """GO start-time windows (ms) that could pair with a COUNT, padded by the GO template length"""
+        pad_ms = self.config.go_template_duration * 1000
+        min_gap_ms = self.config.min_gap_seconds * 1000
+        max_gap_ms = self.config.max_gap_seconds * 1000
+        return [(c + min_gap_ms - pad_ms, c + max_gap_ms + pad_ms) for c in count_times]
     
-    def _remove_overlaps(self, patterns: List[Dict]) -> List[Dict]:
+    def _remove_overlaps(self, patterns: np.ndarray) -> np.ndarray:
         """Remove overlapping patterns, keeping the one with the most typical gap"""
-        cleaned = []
-        overlap_window_ms = self.config.overlap_window_seconds * 1000
-        
-        for i, pattern in enumerate(patterns):
-            is_unique = True
-            
-            for j, other_pattern in enumerate(patterns):
-                if i != j:
-                    time_diff = abs(pattern['start_time_ms'] - other_pattern['start_time_ms'])
-                    if time_diff < overlap_window_ms:
-                        # Keep the one with gap closer to typical race timing (4-5 seconds)
-                        ideal_gap = 4.5
-                        pattern_gap_score = abs(pattern['gap_seconds'] - ideal_gap)
-                        other_gap_score = abs(other_pattern['gap_seconds'] - ideal_gap)
-                        
-                        if pattern_gap_score > other_gap_score:
-                            is_unique = False
-                            break
-            
-            if is_unique:
-                cleaned.append(pattern)
+        # Keep the one with gap closer to typical race timing (4-5 seconds)
+        ideal_gap = 4.5
+        scores = np.abs(patterns['gap_s'] - ideal_gap)
         
-        return cleaned
+        # A pattern survives unless another pattern within the window has a strictly
+        # better gap score
+        keep = _overlap_keep(np.ascontiguousarray(patterns['start_s']), scores, float(self.config.overlap_window_seconds))
+        return patterns[keep]
     
     def save_results(self, patterns: List[Dict], base_filename: str = "pattern_enhanced_results", video_id: str = None) -> Dict[str, str]:
         """
@@ -321,117 +591,127 @@ class PatternEnhancedDetector:
             print("⚠️  No patterns to save")
             return {}
         
-        # Ensure results directory exists
-        os.makedirs("results", exist_ok=True)
+        _ensure_results_dir()
         
         created_files = {}
+        base_url = self._youtube_base_url(video_id)
+        
+        # Per-pattern timestamp fields, computed once and shared by all three formats
+        start_seconds = [int(p['start_time_ms'] / 1000) for p in patterns]
         
         # 1. CSV format for easy analysis
         csv_file = f"results/{base_filename}.csv"
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'Sequence_Number', 'Count_Time_MS', 'Timestamp', 'YouTube_URL'
-            ])
-            writer.writeheader()
-            
-            # Generate YouTube URL based on video_id parameter
-            if video_id:
-                base_url = f'https://www.youtube.com/watch?v={video_id}&t='
-            else:
-                # Fallback to original URL if no video_id provided
-                base_url = 'https://www.youtube.com/live/Z7sjETGD-dg?t='
-            
-            for pattern in patterns:
-                seconds = int(pattern['start_time_ms'] / 1000)
-                minutes = seconds // 60
-                remaining_seconds = seconds % 60
-                
-                row = {
-                    'Sequence_Number': pattern['sequence_number'],
-                    'Count_Time_MS': pattern['start_time_ms'],
-                    'Timestamp': f'{minutes:02d}:{remaining_seconds:02d}',
-                    'YouTube_URL': f'{base_url}{seconds}'
-                }
-                writer.writerow(row)
+        with open(csv_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(self._CSV_HEADER)
+            writer.writerows(
+                self._csv_row(pattern, seconds, base_url)
+                for pattern, seconds in zip(patterns, start_seconds)
+            )
         
         created_files['csv'] = csv_file
         
         # 2. Detailed text report
         txt_file = f"results/{base_filename}_detailed.txt"
         with open(txt_file, 'w', encoding='utf-8') as f:
-            f.write("PATTERN ENHANCED DETECTOR - DETAILED RESULTS\n")
-            f.write("=" * 60 + "\n\n")
-            f.write(f"Detection Method: COUNT→GO Temporal Pattern Matching\n")
-            f.write(f"COUNT Template: {self.count_template}\n")
-            f.write(f"GO Template: {self.go_template}\n")
-            f.write(f"Pattern Gap Range: {self.config.min_gap_seconds}-{self.config.max_gap_seconds} seconds\n")
-            f.write(f"Total Patterns Found: {len(patterns)}\n\n")
-            
-            f.write("DETECTED PATTERNS:\n")
-            f.write("-" * 60 + "\n")
-            f.write("No.  COUNT Time    GO Time      Gap    Start (mm:ss)\n")
-            f.write("-" * 60 + "\n")
-            
-            for pattern in patterns:
-                count_sec = pattern['count_time_ms'] / 1000
-                go_sec = pattern['go_time_ms'] / 1000
-                start_sec = pattern['start_time_ms'] / 1000
-                
-                count_min = int(count_sec // 60)
-                count_s = count_sec % 60
-                go_min = int(go_sec // 60) 
-                go_s = go_sec % 60
-                start_min = int(start_sec // 60)
-                start_s = start_sec % 60
-                
-                f.write(f"{pattern['sequence_number']:2d}   "
-                       f"{count_min:02d}:{count_s:06.3f}  "
-                       f"{go_min:02d}:{go_s:06.3f}  "
-                       f"{pattern['gap_seconds']:4.1f}s  "
-                       f"{start_min:02d}:{start_s:06.3f}\n")
-            
-            f.write("\n" + "-" * 60 + "\n")
-            f.write("Pattern Enhanced Detector v1.0\n")
-            f.write("Temporal sequence analysis for race start detection\n")
+            f.write("".join([
+                self._txt_header(len(patterns)),
+                *(self._txt_row(pattern) for pattern in patterns),
+                self._txt_footer(),
+            ]))
         
         created_files['detailed'] = txt_file
         
         # 3. YouTube links Markdown for easy navigation
         md_file = f"results/{base_filename}_links.md"
         with open(md_file, 'w', encoding='utf-8') as f:
-            f.write(f"# 🏁 JDL Pattern Detection Results\n\n")
-            
-            f.write(f"## Detection Summary\n\n")
-            f.write(f"- **Method**: COUNT→GO Temporal Pattern Matching\n")
-            f.write(f"- **Total Patterns**: {len(patterns)}\n")
-            f.write(f"- **Detection Range**: {self.config.min_gap_seconds}-{self.config.max_gap_seconds} seconds\n\n")
-            
-            f.write(f"## Detected Race Start Sequences\n\n")
-            
-            # Generate YouTube URL based on video_id parameter
-            if video_id:
-                base_url = f'https://www.youtube.com/watch?v={video_id}&t='
-            else:
-                # Fallback to original URL if no video_id provided
-                base_url = 'https://www.youtube.com/live/Z7sjETGD-dg?t='
-            
-            for pattern in patterns:
-                seconds = int(pattern['start_time_ms'] / 1000)
-                minutes = seconds // 60
-                remaining_seconds = seconds % 60
-                
-                f.write(f"### Pattern {pattern['sequence_number']}: {minutes:02d}:{remaining_seconds:02d}\n")
-                f.write(f"- **Gap**: {pattern['gap_seconds']:.1f}s\n")
-                f.write(f"- **YouTube Link**: [🎬 Watch on YouTube]({base_url}{seconds})\n\n")
+            f.write("".join([
+                self._md_header(len(patterns)),
+                *(self._md_row(pattern, seconds, base_url)
+                  for pattern, seconds in zip(patterns, start_seconds)),
+            ]))
         
         created_files['markdown'] = md_file
         
         return created_files
+    
+    @staticmethod
+    def _youtube_base_url(video_id: Optional[str]) -> str:
+        """Timestamp link prefix; seconds are appended per pattern"""
+        if video_id:
+            return f'https://www.youtube.com/watch?v={video_id}&t='
+        # Fallback to original URL if no video_id provided
+        return 'https://www.youtube.com/live/Z7sjETGD-dg?t='
+    
+    _CSV_HEADER = ['Sequence_Number', 'Count_Time_MS', 'Timestamp', 'YouTube_URL']
+    
+    @staticmethod
+    def _csv_row(pattern: Dict, seconds: int, base_url: str) -> tuple:
+        return (pattern['sequence_number'],
+                pattern['start_time_ms'],
+                f'{seconds // 60:02d}:{seconds % 60:02d}',
+                f'{base_url}{seconds}')
+    
+    def _txt_header(self, total: int) -> str:
+        return "".join([
+            "PATTERN ENHANCED DETECTOR - DETAILED RESULTS\n",
+            "=" * 60 + "\n\n",
+            "Detection Method: COUNT→GO Temporal Pattern Matching\n",
+            f"COUNT Template: {self.count_template}\n",
+            f"GO Template: {self.go_template}\n",
+            f"Pattern Gap Range: {self.config.min_gap_seconds}-{self.config.max_gap_seconds} seconds\n",
+            f"Total Patterns Found: {total}\n\n",
+            "DETECTED PATTERNS:\n",
+            "-" * 60 + "\n",
+            "No.  COUNT Time    GO Time      Gap    Start (mm:ss)\n",
+            "-" * 60 + "\n",
+        ])
+    
+    @staticmethod
+    def _txt_row(pattern: Dict) -> str:
+        return (f"{pattern['sequence_number']:2d}   "
+                f"{_mmss(pattern['count_time_ms'])}  "
+                f"{_mmss(pattern['go_time_ms'])}  "
+                f"{pattern['gap_seconds']:4.1f}s  "
+                f"{_mmss(pattern['start_time_ms'])}\n")
+    
+    @staticmethod
+    def _txt_footer() -> str:
+        return ("\n" + "-" * 60 + "\n"
+                "Pattern Enhanced Detector v1.0\n"
+                "Temporal sequence analysis for race start detection\n")
+    
+    def _md_header(self, total: int) -> str:
+        return "".join([
+            "# 🏁 JDL Pattern Detection Results\n\n",
+            "## Detection Summary\n\n",
+            "- **Method**: COUNT→GO Temporal Pattern Matching\n",
+            f"- **Total Patterns**: {total}\n",
+            f"- **Detection Range**: {self.config.min_gap_seconds}-{self.config.max_gap_seconds} seconds\n\n",
+            "## Detected Race Start Sequences\n\n",
+        ])
+    
+    @staticmethod
+    def _md_row(pattern: Dict, seconds: int, base_url: str) -> str:
+        return (f"### Pattern {pattern['sequence_number']}: {seconds // 60:02d}:{seconds % 60:02d}\n"
+                f"- **Gap**: {pattern['gap_seconds']:.1f}s\n"
+                f"- **YouTube Link**: [🎬 Watch on YouTube]({base_url}{seconds})\n\n")
+
+def _ensure_results_dir() -> None:
+    """Create the results directory once per process"""
+    global _RESULTS_INITED
+    if not _RESULTS_INITED:
+        os.makedirs("results", exist_ok=True)
+        _RESULTS_INITED = True
 
-def detect_jdl_patterns_enhanced() -> List[Dict]:
+def detect_jdl_patterns_enhanced(backend: str = 'cpu', cache_dir: Optional[str] = None) -> List[Dict]:
     """
     Main function for enhanced JDL pattern detection
     
+    Args:
+        backend: Correlation backend, 'cpu' or 'cuda'
+        cache_dir: Directory for cached COUNT/GO candidates (None = no caching)
+    
     Returns:
         List of detected patterns
     """
@@ -450,7 +730,9 @@ def detect_jdl_patterns_enhanced() -> List[Dict]:
         go_spectral_threshold=0.2,
         min_gap_seconds=2.0,
         max_gap_seconds=10.0,
-        min_distance_seconds=3.0
+        min_distance_seconds=3.0,
+        backend=backend,
+        cache_dir=cache_dir
     )
     
     detector = PatternEnhancedDetector(config=config)
@@ -487,4 +769,17 @@ def detect_jdl_patterns_enhanced() -> List[Dict]:
     return patterns
 
 if __name__ == "__main__":
-    detect_jdl_patterns_enhanced()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Enhanced COUNT→GO pattern detection for the JDL video')
+    parser.add_argument(
+        '--cuda',
+        action='store_true',
+        help='Run template correlation on the GPU via CuPy (falls back to CPU)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        help='Cache COUNT/GO candidate times in this directory, so reruns that only '
+             'change gap/overlap settings skip correlation (default: no caching)'
+    )
+    args = parser.parse_args()
+    
+    detect_jdl_patterns_enhanced(backend='cuda' if args.cuda else 'cpu', cache_dir=args.cache_dir)
\ No newline at end of file
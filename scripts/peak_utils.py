@@ -0,0 +1,70 @@
+"""
+Peak-picking helpers shared by the template-matching detectors
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+def absmax(x: np.ndarray):
+    """max(|x|) from two reductions, without allocating an |x| temporary"""
+    return max(x.max(), -x.min())
+
+
+def find_peaks_sparse(x: np.ndarray, height: float, distance: int) -> Optional[np.ndarray]:
+    """
+    find_peaks(x, height=height, distance=distance) evaluated only on the samples
+    at or above height. Returns None when that shortcut doesn't apply (dense
+    mask or flat-topped peaks), in which case the caller runs find_peaks.
+    """
+    cand = np.flatnonzero(x >= height)
+    if len(cand) >= len(x) // 100:
+        return None
+
+    # Strict local maxima among the candidates (array ends are never peaks)
+    cand = cand[(cand > 0) & (cand < len(x) - 1)]
+    left, mid, right = x[cand - 1], x[cand], x[cand + 1]
+    if np.any(((mid == left) | (mid == right)) & (mid >= left) & (mid >= right)):
+        return None
+    peaks = cand[(mid > left) & (mid > right)]
+    return select_by_distance(peaks, x[peaks], distance)
+
+
+def select_by_distance(peaks: np.ndarray, heights: np.ndarray, distance: int) -> np.ndarray:
+    """
+    find_peaks' distance rule on sorted peaks: highest peaks claim everything
+    closer than distance. Decided in vectorized rounds instead of one peak at a
+    time: an undecided peak that outranks every undecided peak in its window
+    is kept by the greedy rule, and every peak in a kept peak's window is dropped
+    """
+    n = len(peaks)
+    if n == 0 or distance <= 1:
+        return peaks  # Distinct integer positions are always at least 1 apart
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.argsort(heights)] = np.arange(n)  # find_peaks' processing order, ties included
+    lo = np.searchsorted(peaks, peaks - distance, side='right')
+    hi = np.searchsorted(peaks, peaks + distance, side='left')
+    level = np.floor(np.log2(hi - lo)).astype(int)  # Each window holds its own peak: hi > lo
+
+    keep = np.zeros(n, dtype=bool)
+    undecided = np.ones(n, dtype=bool)
+    while undecided.any():
+        # Sparse table of power-of-two range maxima answers every window in O(1)
+        table = [np.where(undecided, rank, -1)]
+        while 2 ** len(table) <= n:
+            prev = table[-1]
+            half = 2 ** (len(table) - 1)
+            table.append(np.maximum(prev[:-half], prev[half:]))
+        window_top = np.empty(n, dtype=np.int64)
+        for k in np.unique(level):
+            rows = np.flatnonzero(level == k)
+            window_top[rows] = np.maximum(table[k][lo[rows]], table[k][hi[rows] - 2 ** k])
+
+        winners = undecided & (window_top == rank)
+        keep |= winners
+        cover = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(cover, lo[winners], 1)
+        np.add.at(cover, hi[winners], -1)
+        undecided &= np.cumsum(cover[:-1]) == 0
+    return peaks[keep]
@@ -1,7 +1,11 @@
+import functools
+import math
 import librosa
 import numpy as np
+import scipy.fft
 import scipy.signal
-from scipy.signal import find_peaks, correlate, hilbert
+from scipy.signal import find_peaks
+from scripts.peak_utils import absmax, find_peaks_sparse
 from scipy.interpolate import interp1d
 import matplotlib.pyplot as plt
 from pydub import AudioSegment
@@ -9,16 +13,239 @@ import os
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Threads per scipy.fft call (-1 = all cores); set to 1 when detectors already run in parallel processes
+_FFT_WORKERS = -1
+
+def _analytic_envelope(x):
+    """
+    |hilbert(x)| from real FFTs: the Hilbert transform is the rfft spectrum
+    rotated by -90 degrees with DC (and Nyquist) removed
+    """
+    n = len(x)
+    spectrum = scipy.fft.rfft(x, workers=_FFT_WORKERS)
+    spectrum *= -1j
+    spectrum[0] = 0
+    if n % 2 == 0:
+        spectrum[-1] = 0
+    return np.hypot(x, scipy.fft.irfft(spectrum, n, workers=_FFT_WORKERS))
+
+def _boxcar_same(x, w):
+    """
+    np.convolve(x, np.ones(w)/w, mode='same') for w <= len(x), as a prefix-sum
+    moving average (float64 accumulation) in O(N) regardless of w
+    """
+    padded = np.pad(x.astype(np.float64), (w // 2, (w - 1) // 2))
+    csum = np.concatenate(([0.0], np.cumsum(padded)))
+    return (csum[w:] - csum[:-w]) / w
+
+def _resample_poly(audio, orig_sr, target_sr):
+    """Polyphase resampling with the rate ratio reduced to lowest terms"""
+    g = math.gcd(int(orig_sr), int(target_sr))
+    resampled = scipy.signal.resample_poly(audio, int(target_sr) // g, int(orig_sr) // g)
+    return resampled.astype(audio.dtype, copy=False)
+
+def _refine_peaks(correlation, peaks):
+    """
+    Parabolic sub-sample positions and values for interior peak indices; the
+    vectorized form of parabolic_interpolation, evaluated in float64
+    """
+    y1 = correlation[peaks - 1].astype(np.float64)
+    y2 = correlation[peaks].astype(np.float64)
+    y3 = correlation[peaks + 1].astype(np.float64)
+    a = (y1 - 2 * y2 + y3) / 2
+    b = (y3 - y1) / 2
+    
+    curved = np.abs(a) > 1e-10
+    safe_a = np.where(curved, a, 1.0)
+    offsets = np.where(curved, np.clip(-b / (2 * safe_a), -0.5, 0.5), 0.0)
+    values = np.where(curved, y2 - b * b / (4 * safe_a), y2)
+    return peaks + offsets, values
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _refine_peaks(correlation, peaks):
+        positions = np.empty(len(peaks))
+        values = np.empty(len(peaks))
+        for k in range(len(peaks)):
+            p = peaks[k]
+            y1 = np.float64(correlation[p - 1])
+            y2 = np.float64(correlation[p])
+            y3 = np.float64(correlation[p + 1])
+            a = (y1 - 2 * y2 + y3) / 2
+            b = (y3 - y1) / 2
+            if abs(a) > 1e-10:
+                positions[k] = p + min(max(-b / (2 * a), -0.5), 0.5)
+                values[k] = y2 - b * b / (4 * a)
+            else:
+                positions[k] = p
+                values[k] = y2
+        return positions, values
+
+# Overlap-save blocks transformed per batch; bounds FFT workspace to a few MB
+_BLOCKS_PER_BATCH = 16
+
+def _fft_len(reference_len):
+    """Per-block transform length for overlap-save correlation, with only small prime factors"""
+    return scipy.fft.next_fast_len(max(8 * reference_len, 1 << 16), real=True)
+
+def _fft_correlate_valid(target, reference, reference_fft=None):
+    """
+    'valid' cross-correlation of target with reference by overlap-save: each
+    block of _fft_len(M) target samples yields _fft_len(M) - M + 1 outputs, and
+    blocks are transformed in batches. reference_fft, if given, is
+    rfft(reference[::-1], _fft_len(M)) computed in advance
+    """
+    n_valid = len(target) - len(reference) + 1
+    if n_valid <= 0:
+        return np.zeros(0, dtype=target.dtype)
+    
+    n_fft = _fft_len(len(reference))
+    if reference_fft is None:
+        reference_fft = scipy.fft.rfft(reference[::-1], n_fft, workers=_FFT_WORKERS)
+    step = n_fft - len(reference) + 1
+    n_blocks = -(-n_valid // step)
+    
+    # Zero-pad so the last block is full; padding only reaches outputs past n_valid
+    padded_len = (n_blocks - 1) * step + n_fft
+    if padded_len > len(target):
+        target = np.concatenate([target, np.zeros(padded_len - len(target), dtype=target.dtype)])
+    blocks = np.lib.stride_tricks.sliding_window_view(target, n_fft)[::step]
+    
+    correlation = np.empty(n_blocks * step, dtype=np.result_type(target, reference))
+    for first in range(0, n_blocks, _BLOCKS_PER_BATCH):
+        batch = blocks[first:first + _BLOCKS_PER_BATCH]
+        full = scipy.fft.irfft(scipy.fft.rfft(batch, axis=1, workers=_FFT_WORKERS) * reference_fft,
+                               n_fft, axis=1, workers=_FFT_WORKERS)
+        correlation[first * step:(first + len(batch)) * step] = full[:, len(reference) - 1:].reshape(-1)
+    return correlation[:n_valid]
+
+def _suppress_duplicates(times, scores, window):
+    """
+    Greedy non-maximum suppression: indices of kept detections in descending
+    score order, skipping any detection closer than window to one already kept
+    """
+    order = np.argsort(times, kind='stable')
+    times_sorted = times[order]
+    lo = np.searchsorted(times_sorted, times_sorted - window, side='right')
+    hi = np.searchsorted(times_sorted, times_sorted + window, side='left')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    
+    kept_sorted = np.zeros(len(times), dtype=bool)
+    kept = []
+    for i in np.argsort(-scores, kind='stable'):
+        r = rank[i]
+        if not kept_sorted[lo[r]:hi[r]].any():
+            kept_sorted[r] = True
+            kept.append(i)
+    return kept
+
+def _spectral_similarity_batch(segments, ref_mag):
+    """
+    Pearson correlation between each row's FFT magnitude and ref_mag, the
+    |rfft| of an equal-length reference. Same value as np.corrcoef on
+    np.fft.fft magnitudes: the two-sided spectrum of real audio is the rfft
+    bins with every bin except DC (and Nyquist) counted twice
+    """
+    n = segments.shape[1]
+    seg_mag = np.abs(scipy.fft.rfft(segments, axis=1, workers=_FFT_WORKERS))
+    
+    weights = np.full(len(ref_mag), 2.0)
+    weights[0] = 1.0
+    if n % 2 == 0:
+        weights[-1] = 1.0
+    weights /= n
+    
+    seg_centered = seg_mag - (seg_mag @ weights)[:, None]
+    ref_centered = ref_mag - ref_mag @ weights
+    covariance = (seg_centered * ref_centered) @ weights
+    denom = np.sqrt(((seg_centered ** 2) @ weights) * ((ref_centered ** 2) @ weights))
+    similarity = np.zeros(len(segments))
+    np.divide(covariance, denom, out=similarity, where=denom > 0)
+    return similarity
+
+@functools.lru_cache(maxsize=32)
+def _design_bandpass(low_norm, high_norm, order=6):
+    """Butterworth bandpass SOS, cached since every file with the same template reuses it"""
+    sos = scipy.signal.butter(order, [low_norm, high_norm], btype='band', output='sos')
+    sos.setflags(write=False)
+    return sos
+
+@functools.lru_cache(maxsize=8)
+def _load_template(path, template_duration, target_sr):
+    """
+    Trimmed, silence-stripped template resampled to target_sr, with its spectrum
+    and filter range. Cached because every detector for the same reference beep
+    prepares the identical template.
+    
+    Returns:
+        (reference_audio, reference_spectrum, dominant_frequencies, (min_freq, max_freq))
+    """
+    template = ShortTemplateBeepDetector(path, None, template_duration)
+    template.load_and_trim_template()
+    template.reference_audio, _ = template.trim_silence_from_template(template.reference_audio)
+    
+    if template.reference_sr != target_sr:
+        print(f"Resampling reference from {template.reference_sr} Hz to {target_sr} Hz")
+        template.reference_audio = librosa.resample(template.reference_audio,
+                                                    orig_sr=template.reference_sr,
+                                                    target_sr=target_sr).astype(np.float32, copy=False)
+        template.reference_sr = target_sr
+    template.target_sr = target_sr
+    
+    filter_range = template.analyze_template_characteristics()
+    for array in (template.reference_audio, template.reference_spectrum, template.dominant_frequencies):
+        array.setflags(write=False)
+    return template.reference_audio, template.reference_spectrum, template.dominant_frequencies, filter_range
+
+@functools.lru_cache(maxsize=8)
+def _match_template(path, template_duration, target_sr, match_sr):
+    """Cached template at the rate correlation runs at"""
+    reference_audio = _load_template(path, template_duration, target_sr)[0]
+    if match_sr != target_sr:
+        reference_audio = _resample_poly(reference_audio, target_sr, match_sr)
+        reference_audio.setflags(write=False)
+    return reference_audio
+
+@functools.lru_cache(maxsize=8)
+def _template_magnitude(path, template_duration, target_sr):
+    """|rfft| of the cached template, the reference side of spectral validation"""
+    reference_mag = np.abs(scipy.fft.rfft(_load_template(path, template_duration, target_sr)[0]))
+    reference_mag.setflags(write=False)
+    return reference_mag
+
+@functools.lru_cache(maxsize=16)
+def _template_rfft(path, template_duration, target_sr, match_sr, n_fft):
+    """rfft of the normalized, time-reversed cached template at transform length n_fft"""
+    reference_audio = _match_template(path, template_duration, target_sr, match_sr)
+    reference_norm = reference_audio / np.max(np.abs(reference_audio))
+    reference_fft = scipy.fft.rfft(reference_norm[::-1], n_fft, workers=_FFT_WORKERS)
+    reference_fft.setflags(write=False)
+    return reference_fft
+
 class ShortTemplateBeepDetector:
     """
     Beep detector using only the first 0.5 seconds of the reference template
     This approach focuses on the onset portion for more precise timing
     """
     
-    def __init__(self, reference_beep_path, target_audio_path, template_duration=0.5):
+    def __init__(self, reference_beep_path, target_audio_path, template_duration=0.5, correlation_sr=None,
+                 max_search_seconds=None):
         self.reference_beep_path = reference_beep_path
         self.target_audio_path = target_audio_path
         self.template_duration = template_duration  # seconds
+        # Only decode and search the first max_search_seconds of the target (None = all)
+        self.max_search_seconds = max_search_seconds
+        # Rate for correlation and peak picking (e.g. 8000); None = target rate.
+        # Only used when the band-pass range fits below its Nyquist frequency
+        self.correlation_sr = correlation_sr
+        self._match_sr = None
         self.reference_audio = None
         self.target_audio = None
         self.reference_sr = None
@@ -26,13 +253,17 @@ class ShortTemplateBeepDetector:
         self.beep_timings = []
         self.reference_spectrum = None
         self.dominant_frequencies = None
+        self._correlation = None  # Last correlation from template_matching_correlation
+        self._filter_range = None
+        self._template_key = None  # (path, duration, sr) when the template came from _load_template
+        self._reference_mag = None  # |rfft| of a template not loaded through _load_template
         
     def load_and_trim_template(self):
         """Load reference beep and use only the first 0.5 seconds"""
         print("Loading and trimming reference template...")
         
         # Load reference beep
-        self.reference_audio, self.reference_sr = librosa.load(self.reference_beep_path, sr=None)
+        self.reference_audio, self.reference_sr = librosa.load(self.reference_beep_path, sr=None, dtype=np.float32)
         print(f"Original reference: {len(self.reference_audio)} samples at {self.reference_sr} Hz")
         print(f"Original duration: {len(self.reference_audio)/self.reference_sr:.3f} seconds")
         
@@ -50,12 +281,12 @@ class ShortTemplateBeepDetector:
         
     def trim_silence_from_template(self, audio, threshold=0.02):
         """Remove silence from the beginning and end of template"""
-        envelope = np.abs(hilbert(audio))
+        envelope = _analytic_envelope(audio)
         
         # Smooth envelope
         window_size = max(1, len(envelope) // 50)
         if window_size > 1:
-            envelope = np.convolve(envelope, np.ones(window_size)/window_size, mode='same')
+            envelope = _boxcar_same(envelope, window_size)
         
         # Find where energy exceeds threshold
         max_energy = np.max(envelope)
@@ -79,26 +310,21 @@ class ShortTemplateBeepDetector:
         
     def load_audio_files(self):
         """Load and process audio files"""
-        # Load and trim template
-        self.load_and_trim_template()
-        
-        # Further trim silence
-        self.reference_audio, trim_offset = self.trim_silence_from_template(self.reference_audio)
-        
         # Load target audio
         target_sr = 22050
         print(f"Loading target audio (resampling to {target_sr} Hz)...")
-        self.target_audio, self.target_sr = librosa.load(self.target_audio_path, sr=target_sr)
+        if self.max_search_seconds is not None:
+            print(f"Searching only the first {self.max_search_seconds:.1f} seconds")
+        self.target_audio, self.target_sr = librosa.load(self.target_audio_path, sr=target_sr, dtype=np.float32,
+                                                         duration=self.max_search_seconds)
         print(f"Target audio loaded: {len(self.target_audio)} samples at {self.target_sr} Hz")
         print(f"Target audio duration: {len(self.target_audio)/self.target_sr:.1f} seconds")
         
-        # Resample reference to match target
-        if self.reference_sr != self.target_sr:
-            print(f"Resampling reference from {self.reference_sr} Hz to {self.target_sr} Hz")
-            self.reference_audio = librosa.resample(self.reference_audio, 
-                                                    orig_sr=self.reference_sr, 
-                                                    target_sr=self.target_sr)
-            self.reference_sr = self.target_sr
+        # Trimmed, silence-stripped and resampled template (shared across detectors)
+        self._template_key = (self.reference_beep_path, self.template_duration, self.target_sr)
+        (self.reference_audio, self.reference_spectrum,
+         self.dominant_frequencies, self._filter_range) = _load_template(*self._template_key)
+        self.reference_sr = self.target_sr
         
         print(f"Final template: {len(self.reference_audio)} samples ({len(self.reference_audio)/self.reference_sr:.3f}s)")
     
@@ -106,21 +332,20 @@ class ShortTemplateBeepDetector:
         """Analyze frequency characteristics of the short template"""
         print("Analyzing short template characteristics...")
         
-        # Compute FFT
-        fft = np.fft.fft(self.reference_audio)
-        freqs = np.fft.fftfreq(len(fft), 1/self.reference_sr)
-        magnitude = np.abs(fft)
-        self.reference_spectrum = magnitude
+        # Welch PSD: averaged short FFTs are enough to locate the beep tone
+        nperseg = min(2048, len(self.reference_audio))
+        freqs, psd = scipy.signal.welch(self.reference_audio, fs=self.reference_sr,
+                                        nperseg=nperseg, noverlap=nperseg // 2)
+        self.reference_spectrum = psd
         
         # Find peak frequencies
-        half_len = len(magnitude) // 2
-        peaks, properties = find_peaks(magnitude[:half_len], 
-                                       height=np.max(magnitude) * 0.15,
+        peaks, properties = find_peaks(psd,
+                                       height=np.max(psd) * 0.15,
                                        distance=5)
         
         if len(peaks) > 0:
-            peak_magnitudes = magnitude[peaks]
-            top_peak_indices = np.argsort(peak_magnitudes)[-3:]
+            peak_powers = psd[peaks]
+            top_peak_indices = np.argsort(peak_powers)[-3:]
             self.dominant_frequencies = freqs[peaks[top_peak_indices]]
             
             primary_freq = self.dominant_frequencies[-1]
@@ -147,8 +372,11 @@ class ShortTemplateBeepDetector:
             high_norm = 0.3
         
         try:
-            b, a = scipy.signal.butter(6, [low_norm, high_norm], btype='band')
-            filtered_audio = scipy.signal.filtfilt(b, a, audio)
+            # Second-order sections stay stable at order 6; float32 audio is filtered in float32.
+            # Edges are rounded to 1e-4 of Nyquist so near-identical ranges share one design.
+            sos = _design_bandpass(round(low_norm, 4), round(high_norm, 4))
+            audio = np.asarray(audio, dtype=np.float32)
+            filtered_audio = scipy.signal.sosfiltfilt(sos.astype(audio.dtype), audio)
             
             if np.any(np.isnan(filtered_audio)) or np.any(np.isinf(filtered_audio)):
                 return audio
@@ -161,12 +389,21 @@ class ShortTemplateBeepDetector:
         """Perform template matching with short template"""
         print("Performing template matching with short template...")
         
-        # Normalize signals
-        reference_norm = self.reference_audio / np.max(np.abs(self.reference_audio))
-        target_norm = filtered_audio / np.max(np.abs(filtered_audio))
+        sr = self._match_sr or self.target_sr
+        
+        # Normalize signals (process_audio passes target audio already at peak 1)
+        reference_audio = self._matching_reference(sr)
+        reference_norm = reference_audio / np.max(np.abs(reference_audio))
+        peak = absmax(filtered_audio)
+        target_norm = filtered_audio if peak == 1 else filtered_audio / peak
         
-        # Cross-correlation
-        correlation = correlate(target_norm, reference_norm, mode='valid')
+        # Cross-correlation via FFT, with the cached template transform when available
+        reference_fft = None
+        if self._template_key is not None:
+            n_fft = _fft_len(len(reference_norm))
+            reference_fft = _template_rfft(*self._template_key, sr, n_fft)
+        correlation = _fft_correlate_valid(target_norm, reference_norm, reference_fft)
+        self._correlation = correlation
         
         if len(correlation) == 0:
             print("No valid correlation computed")
@@ -176,15 +413,19 @@ class ShortTemplateBeepDetector:
         max_corr = np.max(correlation)
         threshold = max_corr * 0.8  # 80% of maximum - even higher to reduce false positives
         
-        peaks, properties = find_peaks(correlation, 
-                                       height=threshold,
-                                       distance=int(self.target_sr * 0.5))  # Min 0.5s apart
+        # Min 0.5s apart; only the few samples above threshold are examined when possible
+        distance = int(sr * 0.5)
+        peaks = find_peaks_sparse(correlation, threshold, distance)
+        if peaks is None:
+            peaks, properties = find_peaks(correlation, 
+                                           height=threshold,
+                                           distance=distance)
         
         print(f"Found {len(peaks)} correlation peaks above threshold")
         
         detections = []
         for peak in peaks:
-            time_ms = (peak / self.target_sr) * 1000
+            time_ms = (peak / sr) * 1000
             confidence = correlation[peak] / max_corr
             
             detections.append({
@@ -197,6 +438,22 @@ class ShortTemplateBeepDetector:
         
         return detections
     
+    def _reference_magnitude(self):
+        """|rfft| of the full template, computed once per template"""
+        if self._template_key is not None:
+            return _template_magnitude(*self._template_key)
+        if self._reference_mag is None:
+            self._reference_mag = np.abs(scipy.fft.rfft(self.reference_audio))
+        return self._reference_mag
+    
+    def _matching_reference(self, sr):
+        """Template at correlation rate sr"""
+        if self._template_key is not None:
+            return _match_template(*self._template_key, sr)
+        if sr != self.target_sr:
+            return _resample_poly(self.reference_audio, self.target_sr, sr)
+        return self.reference_audio
+    
     def parabolic_interpolation(self, correlation, peak_idx):
         """Parabolic interpolation for sub-sample precision"""
         if peak_idx <= 0 or peak_idx >= len(correlation) - 1:
@@ -218,15 +475,19 @@ class ShortTemplateBeepDetector:
     def refine_detections(self, detections, correlation):
         """Refine detection timing with sub-sample precision"""
         refined_detections = []
+        sr = self._match_sr or self.target_sr
         
-        for detection in detections:
+        # Parabolic interpolation for all interior peaks in one call
+        peak_samples = np.array([int((d['time_ms'] / 1000) * sr) for d in detections], dtype=np.int64)
+        interior = (peak_samples > 0) & (peak_samples < len(correlation) - 1)
+        precise_peaks, _ = _refine_peaks(correlation, peak_samples[interior])
+        precise_peaks = iter(precise_peaks.tolist())
+        
+        for detection, is_interior in zip(detections, interior):
             time_ms = detection['time_ms']
-            peak_sample = int((time_ms / 1000) * self.target_sr)
             
-            # Apply parabolic interpolation
-            if 0 < peak_sample < len(correlation) - 1:
-                precise_peak, precise_value = self.parabolic_interpolation(correlation, peak_sample)
-                refined_time_ms = (precise_peak / self.target_sr) * 1000
+            if is_interior:
+                refined_time_ms = (next(precise_peaks) / sr) * 1000
                 
                 refined_detections.append({
                     'time_ms': refined_time_ms,
@@ -245,30 +506,31 @@ class ShortTemplateBeepDetector:
         return refined_detections
     
     def validate_detections(self, detections, filtered_audio):
-        """Validate detections using spectral similarity"""
-        validated_detections = []
+        """Validate detections using spectral similarity (all segments in one batched FFT)"""
+        segment_len = len(self.reference_audio)
+        starts = np.array([int((d['time_ms'] / 1000) * self.target_sr) for d in detections], dtype=np.int64)
+        in_range = (starts >= 0) & (starts + segment_len <= len(filtered_audio))
+        candidates = [d for d, ok in zip(detections, in_range) if ok]
+        if not candidates:
+            return []
         
-        for detection in detections:
-            time_ms = detection['time_ms']
-            start_sample = int((time_ms / 1000) * self.target_sr)
-            end_sample = start_sample + len(self.reference_audio)
-            
-            if 0 <= start_sample < len(filtered_audio) and end_sample <= len(filtered_audio):
-                audio_segment = filtered_audio[start_sample:end_sample]
-                
-                # Simple spectral validation
-                is_valid, spectral_score = self.validate_spectrum(audio_segment)
+        windows = np.lib.stride_tricks.sliding_window_view(filtered_audio, segment_len)
+        spectral_scores = _spectral_similarity_batch(windows[starts[in_range]], self._reference_magnitude())
+        
+        validated_detections = []
+        for detection, spectral_score in zip(candidates, spectral_scores.tolist()):
+            # Even higher threshold to reduce false positives
+            if spectral_score > 0.6:
+                time_ms = detection['time_ms']
+                final_confidence = detection['confidence'] * spectral_score
+                validated_detections.append({
+                    'time_ms': time_ms,
+                    'confidence': final_confidence,
+                    'spectral_score': spectral_score,
+                    'method': detection['method']
+                })
                 
-                if is_valid:
-                    final_confidence = detection['confidence'] * spectral_score
-                    validated_detections.append({
-                        'time_ms': time_ms,
-                        'confidence': final_confidence,
-                        'spectral_score': spectral_score,
-                        'method': detection['method']
-                    })
-                    
-                    print(f"VALIDATED: {time_ms:.2f} ms (final confidence: {final_confidence:.3f})")
+                print(f"VALIDATED: {time_ms:.2f} ms (final confidence: {final_confidence:.3f})")
         
         return validated_detections
     
@@ -278,29 +540,18 @@ class ShortTemplateBeepDetector:
             return False, 0.0
         
         try:
-            # Ensure same length
+            # Ensure same length; only a short segment needs a truncated reference spectrum
             min_len = min(len(audio_segment), len(self.reference_audio))
-            seg = audio_segment[:min_len]
-            ref = self.reference_audio[:min_len]
-            
-            # FFT
-            seg_fft = np.fft.fft(seg)
-            ref_fft = np.fft.fft(ref)
+            seg = np.asarray(audio_segment[:min_len])
+            if min_len == len(self.reference_audio):
+                ref_mag = self._reference_magnitude()
+            else:
+                ref_mag = np.abs(scipy.fft.rfft(self.reference_audio[:min_len]))
             
             # Magnitude correlation
-            seg_mag = np.abs(seg_fft)
-            ref_mag = np.abs(ref_fft)
+            spectral_similarity = float(_spectral_similarity_batch(seg[None, :], ref_mag)[0])
             
-            if np.max(seg_mag) > 0 and np.max(ref_mag) > 0:
-                seg_norm = seg_mag / np.max(seg_mag)
-                ref_norm = ref_mag / np.max(ref_mag)
-                
-                spectral_similarity = np.corrcoef(seg_norm, ref_norm)[0, 1]
-                
-                if np.isnan(spectral_similarity):
-                    spectral_similarity = 0.0
-                
-                return spectral_similarity > 0.6, spectral_similarity  # Even higher threshold to reduce false positives
+            return spectral_similarity > 0.6, spectral_similarity  # Even higher threshold to reduce false positives
         
         except Exception:
             pass
@@ -312,43 +563,51 @@ class ShortTemplateBeepDetector:
         # Load audio files
         self.load_audio_files()
         
-        # Analyze template characteristics
-        min_freq, max_freq = self.analyze_template_characteristics()
+        # Template characteristics were analyzed with the cached template
+        min_freq, max_freq = self._filter_range
+        print(f"Template dominant frequencies: {self.dominant_frequencies} Hz")
+        print(f"Filter range: {min_freq:.1f} - {max_freq:.1f} Hz")
         
         # Apply frequency filter
         print("Applying frequency filter...")
         filtered_audio = self.apply_frequency_filter(self.target_audio, min_freq, max_freq)
         
+        # Normalize once, in place; matching, refinement and validation all use this buffer
+        if filtered_audio is self.target_audio:
+            filtered_audio = filtered_audio.copy()
+        peak = absmax(filtered_audio)
+        if peak > 0:
+            np.divide(filtered_audio, peak, out=filtered_audio)
+        
+        # Optionally correlate at a lower rate; the band-passed signal has nothing above max_freq
+        match_audio = filtered_audio
+        self._match_sr = self.target_sr
+        if self.correlation_sr and self.correlation_sr < self.target_sr:
+            if max_freq < self.correlation_sr / 2:
+                print(f"Downsampling to {self.correlation_sr} Hz for correlation")
+                match_audio = _resample_poly(filtered_audio, self.target_sr, self.correlation_sr)
+                self._match_sr = self.correlation_sr
+            else:
+                print(f"Filter range exceeds {self.correlation_sr / 2:.0f} Hz, correlating at {self.target_sr} Hz")
+        
         # Template matching
-        detections = self.template_matching_correlation(filtered_audio)
+        detections = self.template_matching_correlation(match_audio)
         
         if not detections:
             print("No detections found")
             return []
         
-        # Refine timing with sub-sample precision
-        correlation = correlate(filtered_audio / np.max(np.abs(filtered_audio)), 
-                                self.reference_audio / np.max(np.abs(self.reference_audio)), 
-                                mode='valid')
-        refined_detections = self.refine_detections(detections, correlation)
+        # Refine timing with sub-sample precision (reuses the matching correlation)
+        refined_detections = self.refine_detections(detections, self._correlation)
         
         # Validate detections
         validated_detections = self.validate_detections(refined_detections, filtered_audio)
         
-        # Sort by confidence and select best
-        validated_detections.sort(key=lambda x: x['confidence'], reverse=True)
-        
-        # Remove duplicates within 100ms
-        final_detections = []
-        for detection in validated_detections:
-            is_duplicate = False
-            for existing in final_detections:
-                if abs(detection['time_ms'] - existing['time_ms']) < 100:
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                final_detections.append(detection)
+        # Keep the most confident detection of every cluster within 100ms
+        kept = _suppress_duplicates(np.array([d['time_ms'] for d in validated_detections], dtype=np.float64),
+                                    np.array([d['confidence'] for d in validated_detections], dtype=np.float64),
+                                    100.0)
+        final_detections = [validated_detections[i] for i in kept]
         
         beep_times = [d['time_ms'] for d in final_detections]
         
@@ -10,12 +10,57 @@ Date: 2025
 """
 
 import argparse
+import functools
 import os
 import sys
-import subprocess
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
+
+@functools.lru_cache(maxsize=1)
+def _load_yt_dlp():
+    """
+    (YoutubeDL, DownloadError) from yt-dlp, or None if it isn't installed.
+    Imported on first use so --help and URL validation don't pay for it.
+    """
+    try:
+        from yt_dlp import YoutubeDL
+        from yt_dlp.utils import DownloadError
+    except ImportError:
+        return None
+    return YoutubeDL, DownloadError
+
+# Containers a finished audio download can end up in, most preferred first
+AUDIO_EXTENSIONS = ('.m4a', '.mp4', '.webm', '.opus')
+
+# Compiled once at import; sanitize_filename and extract_video_id run per download
+_UNSAFE_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+_WHITESPACE_RUN = re.compile(r'[\s]+')
+# A 'watch?v=' URL always matches the first pattern, so it needs no pattern of its own
+_VIDEO_ID_PATTERNS = [
+    re.compile(r'(?:v=|\/)([0-9A-Za-z_-]{11}).*'),
+    re.compile(r'(?:embed\/)([0-9A-Za-z_-]{11})'),
+]
+
+def find_downloaded_audio(output_dir: str, video_id: str) -> Optional[str]:
+    """
+    Existing '<title> [<video_id>].<ext>' in output_dir, found with one directory read
+    
+    Any of AUDIO_EXTENSIONS is accepted (m4a preferred) in case yt-dlp kept the
+    source container instead of converting it.
+    """
+    suffix = f"[{video_id}]"
+    hits = []
+    try:
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if stem.endswith(suffix) and ext in AUDIO_EXTENSIONS and entry.is_file():
+                    hits.append((AUDIO_EXTENSIONS.index(ext), entry.path))
+    except FileNotFoundError:
+        return None
+    return min(hits)[1] if hits else None
 
 def sanitize_filename(filename: str) -> str:
     """
@@ -28,8 +73,8 @@ def sanitize_filename(filename: str) -> str:
         Sanitized filename safe for filesystem use
     """
     # Remove or replace problematic characters
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
-    filename = re.sub(r'[\s]+', ' ', filename)  # Normalize whitespace
+    filename = _UNSAFE_FILENAME_CHARS.sub('', filename)
+    filename = _WHITESPACE_RUN.sub(' ', filename)  # Normalize whitespace
     filename = filename.strip()
     
     # Limit length to prevent filesystem issues
@@ -48,47 +93,51 @@ def get_video_info(url: str) -> Tuple[str, str]:
     Returns:
         Tuple of (title, video_id)
     """
+    yt_dlp = _load_yt_dlp()
+    if yt_dlp is None:
+        video_id = extract_video_id(url)
+        return f"YouTube_Video_{video_id}", video_id
+    YoutubeDL, DownloadError = yt_dlp
+    
     try:
-        cmd = [
-            'yt-dlp',
-            '--get-title',
-            '--get-id',
-            url
-        ]
+        with YoutubeDL({'quiet': True, 'noplaylist': True}) as ydl:
+            info = ydl.extract_info(url, download=False)
         
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        lines = result.stdout.strip().split('\n')
-        
-        if len(lines) >= 2:
-            title = lines[0]
-            video_id = lines[1]
-            return title, video_id
+        if info.get('title') and info.get('id'):
+            return info['title'], info['id']
         else:
             # Fallback: extract ID from URL
             video_id = extract_video_id(url)
             return f"YouTube_Video_{video_id}", video_id
             
-    except subprocess.CalledProcessError as e:
+    except DownloadError as e:
         print(f"❌ Error getting video info: {e}")
         video_id = extract_video_id(url)
         return f"YouTube_Video_{video_id}", video_id
 
 def extract_video_id(url: str) -> str:
     """Extract video ID from YouTube URL"""
-    patterns = [
-        r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
-        r'(?:embed\/)([0-9A-Za-z_-]{11})',
-        r'(?:watch\?v=)([0-9A-Za-z_-]{11})'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern in _VIDEO_ID_PATTERNS:
+        match = pattern.search(url)
         if match:
             return match.group(1)
     
     return "unknown"
 
-def download_audio(url: str, output_dir: str = ".", run_detection: bool = True) -> Optional[str]:
+# Detector reused by run_pattern_detection across downloads, with the config it was built for
+_DETECTOR = None
+_DETECTOR_CONFIG = None
+
+def _import_detection_stack() -> None:
+    """Import the pattern detector and its numpy/scipy/librosa stack ahead of use"""
+    try:
+        import pattern_enhanced_detector  # noqa: F401
+        import scripts.hybrid_configurable_detector  # noqa: F401
+    except ImportError:
+        pass  # run_pattern_detection reports missing dependencies itself
+
+def download_audio(url: str, output_dir: str = ".", run_detection: bool = True,
+                   write_info: bool = True) -> Optional[str]:
     """
     Download audio from YouTube URL in M4A format
     
@@ -96,6 +145,7 @@ def download_audio(url: str, output_dir: str = ".", run_detection: bool = True)
         url: YouTube URL to download
         output_dir: Directory to save the audio file
         run_detection: Whether to run pattern detection after download
+        write_info: Whether to write the video's info JSON next to the audio
         
     Returns:
         Path to downloaded file if successful, None if failed
@@ -105,63 +155,115 @@ def download_audio(url: str, output_dir: str = ".", run_detection: bool = True)
     print(f'🔗 URL: {url}')
     print('=' * 50)
     
-    # Get video information
-    print('📋 Getting video information...')
-    title, video_id = get_video_info(url)
-    sanitized_title = sanitize_filename(title)
-    
-    print(f'📺 Title: {title}')
-    print(f'🆔 Video ID: {video_id}')
-    
-    # Prepare output filename
-    output_filename = f"{sanitized_title} [{video_id}].%(ext)s"
-    output_path = os.path.join(output_dir, output_filename)
+    yt_dlp = _load_yt_dlp()
+    if yt_dlp is None:
+        print('❌ yt-dlp not found. Please install with: pip install yt-dlp')
+        return None
+    YoutubeDL, DownloadError = yt_dlp
     
-    print(f'💾 Output: {output_path}')
-    print()
+    # The detection imports take a few seconds; load them while yt-dlp downloads
+    warmup = None
+    if run_detection:
+        executor = ThreadPoolExecutor(max_workers=1)
+        warmup = executor.submit(_import_detection_stack)
+        executor.shutdown(wait=False)  # The submitted import still runs to completion
     
-    # Download audio using yt-dlp
-    cmd = [
-        'yt-dlp',
-        '--extract-audio',
-        '--audio-format', 'm4a',
-        '--audio-quality', '0',  # Best quality
-        '--output', output_path,
-        '--no-playlist',
-        '--write-info-json',
-        url
-    ]
+    # One yt-dlp session resolves metadata and downloads, instead of one process each
+    ydl_opts = {
+        'format': 'bestaudio[ext=m4a]/bestaudio',
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'm4a',
+            'preferredquality': '0',  # Best quality
+        }],
+        # Escape '%' so the directory is taken literally by the output template
+        'outtmpl': os.path.join(output_dir.replace('%', '%%'), '%(sanitized_title)s [%(id)s].%(ext)s'),
+        'noplaylist': True,
+        'writeinfojson': write_info,
+    }
     
     try:
-        print('⬇️ Downloading audio...')
-        result = subprocess.run(cmd, check=True)
-        
-        # Find the actual downloaded file
-        expected_file = output_path.replace('%(ext)s', 'm4a')
-        
-        if os.path.exists(expected_file):
-            print(f'✅ Download successful: {expected_file}')
+        with YoutubeDL(ydl_opts) as ydl:
+            # Get video information
+            print('📋 Getting video information...')
+            info = ydl.extract_info(url, download=False)
+            title, video_id = info['title'], info['id']
+            sanitized_title = sanitize_filename(title)
+            info['sanitized_title'] = sanitized_title
             
-            # Get file size
-            file_size = os.path.getsize(expected_file)
-            size_mb = file_size / (1024 * 1024)
-            print(f'📊 File size: {size_mb:.1f} MB')
+            print(f'📺 Title: {title}')
+            print(f'🆔 Video ID: {video_id}')
             
-            # Optionally run pattern detection
-            if run_detection:
-                run_pattern_detection(expected_file)
+            # Prepare output filename
+            output_path = os.path.join(output_dir, f"{sanitized_title} [{video_id}].%(ext)s")
             
-            return expected_file
-        else:
-            print(f'❌ Downloaded file not found at expected location: {expected_file}')
-            return None
+            print(f'💾 Output: {output_path}')
+            print()
+            
+            print('⬇️ Downloading audio...')
+            info = ydl.process_ie_result(info, download=True)
             
-    except subprocess.CalledProcessError as e:
+        # The path yt-dlp reports after post-processing
+        expected_file = info['requested_downloads'][0]['filepath']
+        
+        # One stat both confirms the file exists and gives its size
+        try:
+            file_size = os.stat(expected_file).st_size
+        except FileNotFoundError:
+            # The postprocessor may have left a different extension behind
+            found_file = find_downloaded_audio(output_dir, video_id)
+            if found_file is None:
+                print(f'❌ Downloaded file not found at expected location: {expected_file}')
+                return None
+            expected_file = found_file
+            file_size = os.stat(expected_file).st_size
+        
+        print(f'✅ Download successful: {expected_file}')
+        
+        # Get file size
+        size_mb = file_size / (1024 * 1024)
+        print(f'📊 File size: {size_mb:.1f} MB')
+        
+        # Optionally run pattern detection
+        if run_detection:
+            warmup.result()
+            run_pattern_detection(expected_file)
+        
+        return expected_file
+            
+    except DownloadError as e:
         print(f'❌ Download failed: {e}')
         return None
-    except FileNotFoundError:
-        print('❌ yt-dlp not found. Please install with: pip install yt-dlp')
-        return None
+
+def download_batch(urls: List[str], output_dir: str = ".", run_detection: bool = True,
+                   write_info: bool = True, max_workers: int = 4) -> List[Optional[str]]:
+    """
+    Download several YouTube URLs concurrently, then run pattern detection on
+    each downloaded file in turn with one shared detector
+    
+    Args:
+        urls: YouTube URLs to download
+        output_dir: Directory to save the audio files
+        run_detection: Whether to run pattern detection after all downloads
+        write_info: Whether to write each video's info JSON next to its audio
+        max_workers: Concurrent downloads (network-bound, so a few saturate most links)
+        
+    Returns:
+        Downloaded file path per URL, None where the download failed
+    """
+    with ThreadPoolExecutor(max_workers=max_workers + (1 if run_detection else 0)) as executor:
+        # Detection imports load alongside the downloads
+        warmup = executor.submit(_import_detection_stack) if run_detection else None
+        downloads = [executor.submit(download_audio, url, output_dir, False, write_info) for url in urls]
+        downloaded_files = [download.result() for download in downloads]
+    
+    if run_detection:
+        warmup.result()
+        for audio_file in downloaded_files:
+            if audio_file:
+                run_pattern_detection(audio_file)
+    
+    return downloaded_files
 
 def run_pattern_detection(audio_file: str):
     """
@@ -170,6 +272,8 @@ def run_pattern_detection(audio_file: str):
     Args:
         audio_file: Path to audio file
     """
+    global _DETECTOR, _DETECTOR_CONFIG
+    
     print()
     print('🎯 Running COUNT→GO Pattern Detection...')
     print('-' * 50)
@@ -189,7 +293,11 @@ def run_pattern_detection(audio_file: str):
             min_distance_seconds=3.0
         )
         
-        detector = PatternEnhancedDetector(config=config)
+        # Reuse the previous detector when the configuration is unchanged
+        if _DETECTOR is None or _DETECTOR_CONFIG != config:
+            _DETECTOR = PatternEnhancedDetector(config=config)
+            _DETECTOR_CONFIG = config
+        detector = _DETECTOR
         patterns = detector.detect_patterns(audio_file)
         
         if patterns:
@@ -223,14 +331,23 @@ Examples:
   
   # Specify output directory
   python youtube_audio_downloader.py "https://www.youtube.com/watch?v=MSoaNUMg2yo" --output downloads/
+  
+  # Download every URL listed in a file (one per line), then detect in one session
+  python youtube_audio_downloader.py --urls-file playlist.txt
         """
     )
     
     parser.add_argument(
         'url',
+        nargs='?',
         help='YouTube URL to download'
     )
     
+    parser.add_argument(
+        '--urls-file',
+        help='File with one YouTube URL per line (blank lines and # comments ignored)'
+    )
+    
     parser.add_argument(
         '--output', '-o',
         default='.',
@@ -251,19 +368,50 @@ Examples:
     
     args = parser.parse_args()
     
-    # Validate URL
-    if not ('youtube.com' in args.url or 'youtu.be' in args.url):
-        print('❌ Invalid YouTube URL')
+    if (args.url is None) == (args.urls_file is None):
+        parser.error('give either a URL or --urls-file')
+    
+    if args.urls_file:
+        with open(args.urls_file) as f:
+            urls = [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+    else:
+        urls = [args.url]
+    
+    if not urls:
+        print('❌ No URLs to download')
+        sys.exit(1)
+    
+    # Validate URLs
+    invalid = [url for url in urls if not ('youtube.com' in url or 'youtu.be' in url)]
+    if invalid:
+        for url in invalid:
+            print(f'❌ Invalid YouTube URL: {url}')
         sys.exit(1)
     
     # Create output directory if it doesn't exist
     os.makedirs(args.output, exist_ok=True)
     
+    if args.urls_file:
+        downloaded_files = download_batch(urls, args.output, not args.no_detect, write_info=not args.no_info)
+        
+        print()
+        print(f'📦 Downloaded {sum(1 for f in downloaded_files if f)}/{len(urls)} files')
+        for url, downloaded_file in zip(urls, downloaded_files):
+            if downloaded_file:
+                print(f'📂 {downloaded_file}')
+            else:
+                print(f'❌ Failed: {url}')
+        
+        if not all(downloaded_files):
+            sys.exit(1)
+        return
+    
     # Download audio (run detection by default unless --no-detect specified)
     downloaded_file = download_audio(
         args.url, 
         args.output, 
-        not args.no_detect
+        not args.no_detect,
+        write_info=not args.no_info
     )
     
     if downloaded_file:
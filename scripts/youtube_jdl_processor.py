@@ -10,31 +10,53 @@ Date: 2025
 """
 
 import argparse
+import contextlib
+import functools
+import io
+import multiprocessing
 import os
 import sys
-import subprocess
 import re
 import time
 import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional, Tuple, List, Dict
 
 # Global variables for process management
-download_process = None
 detection_running = False
 
+# Set when a batch is interrupted (and cleared when the next one starts); progress
+# hooks then cancel their yt-dlp downloads
+_abort_downloads = threading.Event()
+
+# Persistent per-user yt-dlp cache (YouTube player JS and signature functions), shared by
+# every run and every checkout of this project for the current user
+YTDLP_CACHE_DIR = os.path.expanduser('~/.cache/jdl-ytdlp')
+
+# (title, video_id) per URL, from get_video_info or a completed download
+_video_info_cache: Dict[str, Tuple[str, str]] = {}
+
+# Containers a finished audio download can end up in, most preferred first
+AUDIO_EXTENSIONS = ('.m4a', '.mp4', '.webm', '.opus')
+
+# Compiled once at import; sanitize_filename and extract_video_id run several times per URL
+_UNSAFE_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+_WHITESPACE_RUN = re.compile(r'[\s]+')
+# A 'watch?v=' URL always matches the first pattern, so it needs no pattern of its own
+_VIDEO_ID_PATTERNS = [
+    re.compile(r'(?:v=|\/)([0-9A-Za-z_-]{11}).*'),
+    re.compile(r'(?:embed\/)([0-9A-Za-z_-]{11})'),
+]
+
 def signal_handler(signum, frame):
     """Handle interrupt signals"""
-    global download_process, detection_running
+    global detection_running
     print("\n🛑 Interrupt received. Cleaning up...")
     
-    if download_process and download_process.poll() is None:
-        print("   Terminating download process...")
-        download_process.terminate()
-        try:
-            download_process.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            download_process.kill()
+    # A single-URL download runs on this thread, so the SystemExit below stops it;
+    # process_youtube_urls catches it to abort its download threads and queued work
     
     if detection_running:
         print("   Detection interrupted (results may be incomplete)")
@@ -42,14 +64,35 @@ def signal_handler(signum, frame):
     print("   Cleanup completed.")
     sys.exit(1)
 
-# Register signal handlers
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
+def _init_detection_worker() -> None:
+    """Detection worker initializer: Ctrl-C is left to the parent, FFTs run single-threaded"""
+    # SIGTERM keeps its default action so the parent can still stop a running worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    # Files already run one per worker; all-core FFTs inside each would oversubscribe
+    try:
+        import scripts.hybrid_configurable_detector as detection_engine
+    except ImportError:
+        return
+    detection_engine._FFT_WORKERS = 1
+
+@functools.lru_cache(maxsize=1)
+def _load_yt_dlp():
+    """
+    (YoutubeDL, DownloadError, DownloadCancelled) from yt-dlp, or None if it isn't installed.
+    Imported on first use so --help and URL validation don't pay for it.
+    """
+    try:
+        from yt_dlp import YoutubeDL
+        from yt_dlp.utils import DownloadCancelled, DownloadError
+    except ImportError:
+        return None
+    return YoutubeDL, DownloadError, DownloadCancelled
 
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for filesystem compatibility"""
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
-    filename = re.sub(r'[\s]+', ' ', filename)
+    filename = _UNSAFE_FILENAME_CHARS.sub('', filename)
+    filename = _WHITESPACE_RUN.sub(' ', filename)
     filename = filename.strip()
     
     if len(filename) > 200:
@@ -59,127 +102,194 @@ def sanitize_filename(filename: str) -> str:
 
 def get_video_info(url: str) -> Tuple[str, str]:
     """Get video title and ID from YouTube URL"""
+    if url in _video_info_cache:
+        return _video_info_cache[url]
+    
+    yt_dlp = _load_yt_dlp()
+    if yt_dlp is None:
+        video_id = extract_video_id(url)
+        return f"YouTube_Video_{video_id}", video_id
+    YoutubeDL, DownloadError, _ = yt_dlp
+    
     try:
-        cmd = ['yt-dlp', '--get-title', '--get-id', url]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        lines = result.stdout.strip().split('\n')
+        with YoutubeDL({'quiet': True, 'noplaylist': True, 'cachedir': YTDLP_CACHE_DIR}) as ydl:
+            info = ydl.extract_info(url, download=False)
         
-        if len(lines) >= 2:
-            title = lines[0]
-            video_id = lines[1]
+        if info.get('title') and info.get('id'):
+            title = info['title']
+            video_id = info['id']
+            _video_info_cache[url] = (title, video_id)
             return title, video_id
         else:
             video_id = extract_video_id(url)
             return f"YouTube_Video_{video_id}", video_id
             
-    except subprocess.CalledProcessError as e:
+    except DownloadError as e:
         print(f"❌ Error getting video info: {e}")
         video_id = extract_video_id(url)
         return f"YouTube_Video_{video_id}", video_id
 
 def extract_video_id(url: str) -> str:
     """Extract video ID from YouTube URL"""
-    patterns = [
-        r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
-        r'(?:embed\/)([0-9A-Za-z_-]{11})',
-        r'(?:watch\?v=)([0-9A-Za-z_-]{11})'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern in _VIDEO_ID_PATTERNS:
+        match = pattern.search(url)
         if match:
             return match.group(1)
     
     return "unknown"
 
-def download_youtube_audio(url: str, output_dir: str = ".") -> Optional[str]:
-    """Download audio from YouTube URL in M4A format"""
-    global download_process
-    
+def _make_progress_hook():
+    """yt-dlp progress hook for one download: reports each 10% step once"""
+    last_step = -1
+    
+    def hook(status: Dict) -> None:
+        nonlocal last_step
+        if _abort_downloads.is_set():
+            # yt-dlp's own cancellation signal: it cleans up and re-raises to the caller
+            _, _, DownloadCancelled = _load_yt_dlp()
+            raise DownloadCancelled('batch interrupted')
+        if status['status'] != 'downloading':
+            return
+        total = status.get('total_bytes') or status.get('total_bytes_estimate')
+        if not total:
+            return
+        pct = min(100.0, status['downloaded_bytes'] * 100 / total)
+        step = int(pct // 10)
+        if step > last_step:
+            last_step = step
+            print(f'   Progress: {step * 10}%')
+    
+    return hook
+
+def find_downloaded_audio(output_dir: str, video_id: str) -> Optional[str]:
+    """
+    Existing '<title> [<video_id>].<ext>' in output_dir, located without fetching the title
+    
+    One directory read; any of AUDIO_EXTENSIONS is accepted (m4a preferred) in
+    case yt-dlp kept the source container instead of converting it.
+    """
+    if video_id == "unknown":
+        return None
+    suffix = f"[{video_id}]"
+    hits = []
+    try:
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if stem.endswith(suffix) and ext in AUDIO_EXTENSIONS and entry.is_file():
+                    hits.append((AUDIO_EXTENSIONS.index(ext), entry.path))
+    except FileNotFoundError:
+        return None
+    return min(hits)[1] if hits else None
+
+def download_youtube_audio(url: str, output_dir: str = ".", sleep_requests: float = 0,
+                           concurrent_fragments: int = 4) -> Optional[str]:
+    """
+    Download audio from YouTube URL in M4A format
+    
+    sleep_requests: seconds between yt-dlp requests
+    concurrent_fragments: DASH fragments fetched in parallel
+    """
     print(f'🎬 YouTube Audio Downloader')
     print('=' * 50)
     print(f'🔗 URL: {url}')
     print('=' * 50)
     
-    # Get video information
-    print('📋 Getting video information...')
-    title, video_id = get_video_info(url)
-    sanitized_title = sanitize_filename(title)
-    
-    print(f'📺 Title: {title}')
-    print(f'🆔 Video ID: {video_id}')
-    
-    # Check if file already exists
-    expected_file = os.path.join(output_dir, f"{sanitized_title} [{video_id}].m4a")
-    if os.path.exists(expected_file):
-        file_size = os.path.getsize(expected_file)
+    # Check if file already exists (the URL carries the video ID, so no metadata fetch)
+    existing_file = find_downloaded_audio(output_dir, extract_video_id(url))
+    if existing_file:
+        file_size = os.path.getsize(existing_file)
         size_mb = file_size / (1024 * 1024)
-        print(f'✅ File already exists: {expected_file} ({size_mb:.1f} MB)')
-        return expected_file
-    
-    # Prepare output filename
-    output_filename = f"{sanitized_title} [{video_id}].%(ext)s"
-    output_path = os.path.join(output_dir, output_filename)
+        print(f'✅ File already exists: {existing_file} ({size_mb:.1f} MB)')
+        return existing_file
     
-    print(f'💾 Output: {output_path}')
-    print()
-    
-    # Download audio using yt-dlp
-    cmd = [
-        'yt-dlp',
-        '--extract-audio',
-        '--audio-format', 'm4a',
-        '--audio-quality', '0',
-        '--output', output_path,
-        '--no-playlist',
-        url
-    ]
+    yt_dlp = _load_yt_dlp()
+    if yt_dlp is None:
+        print('❌ yt-dlp not found. Please install with: pip install yt-dlp')
+        return None
+    YoutubeDL, DownloadError, _ = yt_dlp
+    
+    # yt-dlp runs in-process: metadata and download share one session and player cache
+    ydl_opts = {
+        'format': 'bestaudio[ext=m4a]/bestaudio',
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'm4a',
+            'preferredquality': '0',
+        }],
+        # Escape '%' so the directory is taken literally by the output template
+        'outtmpl': os.path.join(output_dir.replace('%', '%%'), '%(sanitized_title)s [%(id)s].%(ext)s'),
+        'noplaylist': True,
+        'cachedir': YTDLP_CACHE_DIR,
+        'quiet': True,
+        'noprogress': True,
+        'progress_hooks': [_make_progress_hook()],
+        'sleep_interval_requests': sleep_requests,
+        # Overlap fragment requests, fetch plain HTTP audio in 10 MB ranges, and
+        # restart a connection YouTube throttles below 100 KB/s
+        'concurrent_fragment_downloads': concurrent_fragments,
+        'http_chunk_size': 10 * 1024 * 1024,
+        'throttledratelimit': 100 * 1024,
+    }
     
     try:
-        print('⬇️ Starting download...')
-        download_process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-        
-        # Monitor download progress
-        for line in iter(download_process.stdout.readline, ''):
-            if line:
-                line = line.strip()
-                if '[download]' in line and '%' in line:
-                    # Extract progress percentage
-                    if 'ETA' in line:
-                        parts = line.split()
-                        for i, part in enumerate(parts):
-                            if part.endswith('%'):
-                                percentage = part.rstrip('%')
-                                try:
-                                    pct = float(percentage)
-                                    if pct % 10 == 0 or pct > 95:  # Show every 10% or final stages
-                                        print(f'   Progress: {percentage}%')
-                                except ValueError:
-                                    pass
-        
-        download_process.wait()
+        with YoutubeDL(ydl_opts) as ydl:
+            # Get video information
+            print('📋 Getting video information...')
+            info = ydl.extract_info(url, download=False)
+            title, video_id = info['title'], info['id']
+            _video_info_cache[url] = (title, video_id)
+            info['sanitized_title'] = sanitize_filename(title)
+            
+            print(f'📺 Title: {title}')
+            print(f'🆔 Video ID: {video_id}')
+            print(f'💾 Output directory: {output_dir}')
+            print()
+            
+            print('⬇️ Starting download...')
+            info = ydl.process_ie_result(info, download=True)
         
-        if download_process.returncode == 0:
-            if os.path.exists(expected_file):
-                file_size = os.path.getsize(expected_file)
-                size_mb = file_size / (1024 * 1024)
-                print(f'✅ Download successful: {expected_file} ({size_mb:.1f} MB)')
-                return expected_file
-            else:
-                print(f'❌ Downloaded file not found at expected location: {expected_file}')
+        downloaded_file = info['requested_downloads'][0]['filepath']
+        # One stat both confirms the file exists and gives its size
+        try:
+            file_size = os.stat(downloaded_file).st_size
+        except FileNotFoundError:
+            # The postprocessor may have left a different extension behind
+            found_file = find_downloaded_audio(output_dir, video_id)
+            if found_file is None:
+                print(f'❌ Downloaded file not found at reported location: {downloaded_file}')
                 return None
-        else:
-            print(f'❌ Download failed with return code: {download_process.returncode}')
-            return None
+            downloaded_file = found_file
+            file_size = os.stat(downloaded_file).st_size
+        size_mb = file_size / (1024 * 1024)
+        print(f'✅ Download successful: {downloaded_file} ({size_mb:.1f} MB)')
+        return downloaded_file
             
-    except subprocess.CalledProcessError as e:
+    except DownloadError as e:
         print(f'❌ Download failed: {e}')
         return None
-    except FileNotFoundError:
-        print('❌ yt-dlp not found. Please install with: pip install yt-dlp')
-        return None
-    finally:
-        download_process = None
+
+@functools.lru_cache(maxsize=None)
+def _get_pattern_detector():
+    """
+    PatternEnhancedDetector with the optimized configuration, built once per process
+    
+    Imported on first use so --help, downloads and failed lookups don't load
+    numpy/scipy/librosa; an ImportError is not cached and surfaces on each call.
+    """
+    from pattern_enhanced_detector import PatternEnhancedDetector, PatternConfig
+    
+    # Use optimized configuration
+    config = PatternConfig(
+        count_correlation_threshold=0.32,
+        count_spectral_threshold=0.12,
+        go_correlation_threshold=0.32,
+        go_spectral_threshold=0.18,
+        min_gap_seconds=2.0,
+        max_gap_seconds=10.0,
+        min_distance_seconds=3.0
+    )
+    return PatternEnhancedDetector(config=config)
 
 def run_pattern_detection(audio_file: str, output_base_name: str = None, video_id: str = None) -> Optional[List[Dict]]:
     """Run COUNT→GO pattern detection on audio file"""
@@ -192,20 +302,7 @@ def run_pattern_detection(audio_file: str, output_base_name: str = None, video_i
     detection_running = True
     
     try:
-        from pattern_enhanced_detector import PatternEnhancedDetector, PatternConfig
-        
-        # Use optimized configuration
-        config = PatternConfig(
-            count_correlation_threshold=0.32,
-            count_spectral_threshold=0.12,
-            go_correlation_threshold=0.32,
-            go_spectral_threshold=0.18,
-            min_gap_seconds=2.0,
-            max_gap_seconds=10.0,
-            min_distance_seconds=3.0
-        )
-        
-        detector = PatternEnhancedDetector(config=config)
+        detector = _get_pattern_detector()
         
         print(f'🎵 Processing: {audio_file}')
         start_time = time.time()
@@ -256,7 +353,8 @@ def run_pattern_detection(audio_file: str, output_base_name: str = None, video_i
     finally:
         detection_running = False
 
-def process_youtube_url(url: str, output_dir: str = ".", skip_download: bool = False) -> bool:
+def process_youtube_url(url: str, output_dir: str = ".", skip_download: bool = False,
+                        concurrent_fragments: int = 4) -> bool:
     """Complete processing pipeline: download + pattern detection"""
     
     print(f'🚀 YouTube JDL Processor Pipeline')
@@ -268,31 +366,10 @@ def process_youtube_url(url: str, output_dir: str = ".", skip_download: bool = F
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
     
-    # Step 1: Download audio (if not skipped)
-    audio_file = None
-    if skip_download:
-        # Try to find existing audio file
-        title, video_id = get_video_info(url)
-        sanitized_title = sanitize_filename(title)
-        potential_file = os.path.join(output_dir, f"{sanitized_title} [{video_id}].m4a")
-        if os.path.exists(potential_file):
-            audio_file = potential_file
-            print(f'📁 Using existing file: {audio_file}')
-        else:
-            print(f'❌ Existing file not found: {potential_file}')
-            return False
-    else:
-        audio_file = download_youtube_audio(url, output_dir)
-    
-    if not audio_file:
-        print('❌ Audio download failed')
+    resolved = _resolve_audio(url, output_dir, skip_download, concurrent_fragments=concurrent_fragments)
+    if resolved is None:
         return False
-    
-    # Step 2: Pattern detection
-    # Generate clean base name for results
-    title, video_id = get_video_info(url)
-    sanitized_title = sanitize_filename(title)
-    output_base_name = f"{sanitized_title}_{video_id}"
+    audio_file, output_base_name, video_id = resolved
     
     patterns = run_pattern_detection(audio_file, output_base_name, video_id)
     
@@ -307,6 +384,140 @@ def process_youtube_url(url: str, output_dir: str = ".", skip_download: bool = F
         print(f'📂 Audio file: {audio_file}')
         return False
 
+def _resolve_audio(url: str, output_dir: str, skip_download: bool,
+                   sleep_requests: float = 0, concurrent_fragments: int = 4) -> Optional[Tuple[str, str, str]]:
+    """
+    Pipeline step 1: download the URL's audio, or locate it when skip_download
+    
+    Returns:
+        (audio_file, output_base_name, video_id), or None if no audio is available
+    """
+    # Step 1: Download audio (if not skipped)
+    url_video_id = extract_video_id(url)
+    audio_file = None
+    if skip_download:
+        # Try to find existing audio file: by the URL's video ID first, which
+        # needs no metadata fetch, then by the name built from the video title
+        audio_file = find_downloaded_audio(output_dir, url_video_id)
+        if audio_file is None:
+            title, video_id = get_video_info(url)
+            sanitized_title = sanitize_filename(title)
+            potential_file = os.path.join(output_dir, f"{sanitized_title} [{video_id}].m4a")
+            if not os.path.exists(potential_file):
+                print(f'❌ Existing file not found: {potential_file}')
+                return None
+            audio_file = potential_file
+        print(f'📁 Using existing file: {audio_file}')
+    else:
+        yt_dlp = _load_yt_dlp()
+        DownloadCancelled = yt_dlp[2] if yt_dlp is not None else ()
+        try:
+            audio_file = download_youtube_audio(url, output_dir, sleep_requests, concurrent_fragments)
+        except DownloadCancelled:
+            print(f'🛑 Download cancelled: {url}')
+            return None
+    
+    if not audio_file:
+        print('❌ Audio download failed')
+        return None
+    
+    # Step 2: Pattern detection
+    # Generate clean base name for results; the audio file is named
+    # '<sanitized title> [<video id>].m4a', so both usually come from its name
+    stem = Path(audio_file).stem
+    id_suffix = f" [{url_video_id}]"
+    if url_video_id != "unknown" and stem.endswith(id_suffix):
+        sanitized_title, video_id = stem[:-len(id_suffix)], url_video_id
+    else:
+        title, video_id = get_video_info(url)
+        sanitized_title = sanitize_filename(title)
+    output_base_name = f"{sanitized_title}_{video_id}"
+    
+    return audio_file, output_base_name, video_id
+
+def _terminate_pool(pool: ProcessPoolExecutor) -> None:
+    """Cancel a process pool's queued work and kill its running workers"""
+    if hasattr(pool, 'terminate_workers'):  # Python 3.14+
+        pool.terminate_workers()
+        return
+    # shutdown() drops the pool's process references, so take them first
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+def _detect_captured(audio_file: str, output_base_name: str, video_id: str) -> Tuple[Optional[List[Dict]], str]:
+    """Worker-process entry point: (run_pattern_detection result, captured console output)"""
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        patterns = run_pattern_detection(audio_file, output_base_name, video_id)
+    return patterns, log.getvalue()
+
+def process_youtube_urls(urls: List[str], output_dir: str = ".", skip_download: bool = False,
+                         max_downloads: int = 3, concurrent_fragments: int = 4,
+                         max_detections: int = 2) -> int:
+    """
+    Batch pipeline: downloads run concurrently on threads, and each file's
+    pattern detection starts in a worker process as soon as its audio is ready
+    
+    Each detection worker holds its whole decoded stream in memory (several GB
+    for a multi-hour race day), so max_detections bounds peak memory as well
+    as CPU use.
+    
+    Returns:
+        Number of URLs for which patterns were detected
+    """
+    print(f'🚀 YouTube JDL Processor Pipeline - {len(urls)} URLs')
+    print('=' * 60)
+    for url in urls:
+        print(f'🔗 URL: {url}')
+    print(f'📂 Output: {output_dir}')
+    print('=' * 60)
+    
+    os.makedirs(output_dir, exist_ok=True)
+    _abort_downloads.clear()
+    
+    succeeded = 0
+    # Spawned workers: forking while download threads run could copy held locks
+    detect_workers = max(1, min(len(urls), max_detections, os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=max_downloads) as downloads, \
+            ProcessPoolExecutor(max_workers=detect_workers,
+                                mp_context=multiprocessing.get_context('spawn'),
+                                initializer=_init_detection_worker) as detections:
+        try:
+            # One request per second per download keeps parallel fetches polite to YouTube
+            resolving = {downloads.submit(_resolve_audio, url, output_dir, skip_download, 1.0,
+                                          concurrent_fragments): url
+                         for url in urls}
+            detecting = {}
+            for future in as_completed(resolving):
+                resolved = future.result()
+                if resolved is None:
+                    print(f'❌ No audio for: {resolving[future]}')
+                    continue
+                detecting[detections.submit(_detect_captured, *resolved)] = resolved
+            
+            for future in as_completed(detecting):
+                audio_file, output_base_name, _ = detecting[future]
+                patterns, log = future.result()
+                sys.stdout.write(log)
+                if patterns:
+                    succeeded += 1
+                    print(f'\n🎉 {len(patterns)} patterns: results/{output_base_name}.*')
+                else:
+                    print(f'\n⚠️ No patterns detected: {audio_file}')
+        except (KeyboardInterrupt, SystemExit):
+            # Leaving the with-blocks would otherwise wait for every queued download and
+            # running detection: drop queued work, cancel running downloads at their next
+            # hook call, and stop the workers (they ignore Ctrl-C themselves)
+            _abort_downloads.set()
+            downloads.shutdown(wait=False, cancel_futures=True)
+            _terminate_pool(detections)
+            raise
+    
+    print(f'\n📊 Patterns detected for {succeeded}/{len(urls)} URLs')
+    return succeeded
+
 def main():
     """Main function for command line interface"""
     parser = argparse.ArgumentParser(
@@ -322,12 +533,18 @@ Examples:
   
   # Skip download and process existing file
   python youtube_jdl_processor.py "https://www.youtube.com/watch?v=MSoaNUMg2yo" --skip-download
+  
+  # Process several videos: downloads overlap, detection starts as each file lands
+  python youtube_jdl_processor.py "https://youtu.be/VIDEO_ID_1" "https://youtu.be/VIDEO_ID_2"
+
+yt-dlp keeps YouTube player data in the per-user ~/.cache/jdl-ytdlp so later runs skip re-fetching it.
         """
     )
     
     parser.add_argument(
         'url',
-        help='YouTube URL to process'
+        nargs='+',
+        help='YouTube URL(s) to process; several URLs download concurrently'
     )
     
     parser.add_argument(
@@ -342,19 +559,46 @@ Examples:
         help='Skip download and process existing audio file'
     )
     
+    parser.add_argument(
+        '--concurrent-fragments',
+        type=int,
+        default=4,
+        help='DASH fragments to download in parallel per video (default: 4)'
+    )
+    
+    parser.add_argument(
+        '--detect-workers',
+        type=int,
+        default=2,
+        help='Files analysed in parallel when several URLs are given; each holds its '
+             'decoded audio in memory, several GB for a long stream (default: 2)'
+    )
+    
     args = parser.parse_args()
     
-    # Validate URL
-    if not ('youtube.com' in args.url or 'youtu.be' in args.url):
-        print('❌ Invalid YouTube URL')
+    # Register signal handlers here, not at import: spawned detection workers import this module
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
+    # Validate URLs
+    invalid = [url for url in args.url if not ('youtube.com' in url or 'youtu.be' in url)]
+    if invalid:
+        for url in invalid:
+            print(f'❌ Invalid YouTube URL: {url}')
         sys.exit(1)
     
-    # Process the URL
-    success = process_youtube_url(
-        args.url,
-        args.output,
-        args.skip_download
-    )
+    # Process the URL(s)
+    if len(args.url) == 1:
+        success = process_youtube_url(
+            args.url[0],
+            args.output,
+            args.skip_download,
+            args.concurrent_fragments
+        )
+    else:
+        success = process_youtube_urls(args.url, args.output, args.skip_download,
+                                       concurrent_fragments=args.concurrent_fragments,
+                                       max_detections=args.detect_workers) == len(args.url)
     
     if success:
         print('\n✅ All processing completed successfully!')